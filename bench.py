@@ -0,0 +1,199 @@
+"""Benchmark the No Thanks game engine."""
+
+from importlib import import_module
+from random import Random, choices, seed
+import subprocess
+import sys
+from time import perf_counter
+
+import ladder
+import nothanks
+
+
+# Seconds the command line may spend importing before it can start a game
+IMPORT_BUDGET = 0.1
+# Modules too slow to import on every start-up
+HEAVY_MODULES = ['networkx', 'numpy', 'pandas', 'progress']
+
+
+class UniformLadder(ladder.Ladder):
+    """Ladder that seats strategies uniformly at random, as compete does."""
+
+    def matchmake(self, num_players):
+        return self.rng.choices(list(self.strategies), k=num_players)
+
+
+class BroadcastGame(nothanks.Game):
+    """Game that notifies every player of every action, ignoring subscriptions."""
+
+    def notify_players(self, player, card, pot, took_card):
+        player_id = id(player)
+        for p in self.players:
+            self.notify_player(p, player_id, card, pot, took_card)
+
+
+def time_games(game_class, strategies, num_players, num_games, rng_seed=0):
+    """Return seconds spent running num_games games of randomly mixed tables."""
+    seed(rng_seed)
+    tables = [[import_module(s).Player() for s in choices(strategies, k=num_players)]
+              for _ in range(num_games)]
+    start = perf_counter()
+    for players in tables:
+        game_class(players).run()
+    return perf_counter() - start
+
+
+def bench_notify(strategies=('nothanks', 'threshold', 'sequence_threshold'),
+                 game_sizes=(3, 4, 5), num_games=2000):
+    """Compare turn loop time with and without notification subscriptions."""
+    for num_players in game_sizes:
+        broadcast = time_games(BroadcastGame, strategies, num_players, num_games)
+        subscribed = time_games(nothanks.Game, strategies, num_players, num_games)
+        print('{}-player games: broadcast {:.3f} s, subscribed {:.3f} s '
+              '({:.2f}x)'.format(num_players, broadcast, subscribed,
+                                 broadcast / subscribed))
+
+
+def bench_rollouts(num_players=4, num_rollouts=5000, rng_seed=0):
+    """Time snapshots and random rollouts from the start of a game."""
+    rng = Random(rng_seed)
+    game = nothanks.Game([nothanks.Player() for _ in range(num_players)], rng=rng)
+    game.setup_game()
+
+    start = perf_counter()
+    for _ in range(num_rollouts):
+        snapshot = game.snapshot()
+    snapshot_time = (perf_counter() - start) / num_rollouts
+
+    start = perf_counter()
+    for _ in range(num_rollouts):
+        game.restore(snapshot)
+    restore_time = (perf_counter() - start) / num_rollouts
+
+    start = perf_counter()
+    for _ in range(num_rollouts):
+        game.restore(snapshot)
+        game.sample_deck()
+        while game.step(rng.random() < 0.5):
+            pass
+    rollout_time = perf_counter() - start
+
+    print('snapshot {:.1f} us, restore {:.1f} us'.format(snapshot_time * 1e6,
+                                                         restore_time * 1e6))
+    print('{}-player rollouts: {:.0f} per second'.format(num_players,
+                                                        num_rollouts / rollout_time))
+
+
+def bench_scaling(deck_sizes=(24, 100, 300, 1000), player_counts=(3, 5, 10),
+                  strategies=('threshold', 'sequence_threshold'), num_games=20):
+    """Time each turn for growing decks and tables."""
+    print('cards players  us/turn')
+    for num_cards in deck_sizes:
+        for num_players in player_counts:
+            seed(0)
+            turns = 0
+            elapsed = 0
+            for _ in range(num_games):
+                players = [import_module(s).Player() for s in choices(strategies, k=num_players)]
+                game = nothanks.Game(players, low_card=3, high_card=num_cards + 2, discard=0)
+                start = perf_counter()
+                game.run()
+                elapsed += perf_counter() - start
+                turns += len(game.decisions)
+            print('{:5} {:7} {:8.2f}'.format(num_cards, num_players, elapsed / turns * 1e6))
+
+
+def rank_correlation(ratings, other_ratings):
+    """Return the Spearman correlation of the rankings by two sets of ratings."""
+    def ranks(values):
+        order = sorted(values, key=values.get)
+        return {name: rank for rank, name in enumerate(order)}
+    ranks_a, ranks_b = ranks(ratings), ranks(other_ratings)
+    n = len(ranks_a)
+    squares = sum((ranks_a[name] - ranks_b[name]) ** 2 for name in ranks_a)
+    return 1 - 6 * squares / (n * (n * n - 1))
+
+
+def games_to_converge(board, reference, num_games, block=300, target=0.85):
+    """Play num_games games and return when the ranking settled near reference.
+
+    Return the games after which the rank correlation with reference stayed at
+    least target (None if it never did) and the final rank correlation.
+    """
+    converged = None
+    for played in range(block, num_games + 1, block):
+        board.run(block)
+        correlation = rank_correlation(board.ratings, reference)
+        if correlation < target:
+            converged = None
+        elif converged is None:
+            converged = played
+    return converged, correlation
+
+
+def bench_ladder(pool_size=40, num_games=9000, reference_games=20000, repeat=3):
+    """Compare the games matchmaking and uniform seating need to rank a large pool.
+
+    Rankings are compared to the summed ratings of four long uniformly seated
+    runs, which are less noisy than any one run.
+    """
+    half = pool_size // 2
+    strategies = ([('threshold', {'threshold': t}) for t in range(half)] +
+                  [('sequence_threshold', {'threshold': t}) for t in range(pool_size - half)])
+    reference = dict.fromkeys(map(nothanks.strategy_name, strategies), 0)
+    for i in range(4):
+        board = UniformLadder(strategies, rng=Random(-1 - i))
+        board.run(reference_games)
+        for name, rating in board.ratings.items():
+            reference[name] += rating
+    for label, ladder_class in [('matchmaking', ladder.Ladder), ('uniform', UniformLadder)]:
+        for i in range(repeat):
+            converged, correlation = games_to_converge(
+                ladder_class(strategies, rng=Random(i)), reference, num_games)
+            print('{:12} stable ranking after {:>6} games (final rank correlation {:.2f})'.format(
+                label, '>{}'.format(num_games) if converged is None else converged,
+                correlation))
+
+
+def time_import(module, repeat=5):
+    """Return the best time in seconds for a fresh interpreter to import module.
+
+    The time to start an interpreter that imports nothing is subtracted.
+    """
+    def best_time(code):
+        times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            subprocess.check_call([sys.executable, '-c', code])
+            times.append(perf_counter() - start)
+        return min(times)
+    return best_time('import ' + module) - best_time('pass')
+
+
+def heavy_imports(module):
+    """Return the heavy modules loaded by importing module."""
+    code = ('import sys, {}; print(" ".join(m for m in {!r} if m in sys.modules))'
+            .format(module, HEAVY_MODULES))
+    return subprocess.check_output([sys.executable, '-c', code],
+                                   universal_newlines=True).split()
+
+
+def bench_imports(modules=('cli', 'compete', 'mini_nothanks_crm')):
+    """Time importing the entry points against the start-up budget."""
+    for module in modules:
+        elapsed = time_import(module)
+        print('import {}: {:.3f} s ({} budget of {:.3f} s)'.format(
+            module, elapsed, 'within' if elapsed <= IMPORT_BUDGET else 'OVER',
+            IMPORT_BUDGET))
+
+
+def main():
+    bench_notify()
+    bench_rollouts()
+    bench_scaling()
+    bench_ladder()
+    bench_imports()
+
+
+if __name__ == "__main__":
+    main()
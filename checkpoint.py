@@ -0,0 +1,98 @@
+"""Save and restore the progress of long competitions and training runs.
+
+Small states are saved whole with save, which writes to a temporary file and
+renames it so a checkpoint is never left half written. Large states that change
+a little at a time are appended to a Journal instead, so each checkpoint only
+writes what changed since the last one.
+"""
+
+from contextlib import contextmanager
+import os
+import pickle
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+def save(path, state):
+    """Pickle state to path atomically.
+
+    Each save writes its own temporary file, so processes saving to the same
+    path at once never mix their writes (the last to finish wins).
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def lock(path):
+    """Hold an exclusive lock on path (through path + '.lock') for the enclosed code.
+
+    Use it to read, update and save a checkpoint shared by several processes.
+    Locking is skipped where fcntl is not available.
+    """
+    with open(path + '.lock', 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def load(path):
+    """Return the state saved to path, or None if there is no checkpoint."""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def check_run(path, saved_run, run):
+    """Raise ValueError unless a checkpoint was saved by a run with the same settings."""
+    if saved_run != run:
+        raise ValueError('Checkpoint {} was saved by a different run: {} rather than {}'
+                         .format(path, saved_run, run))
+
+
+class Journal():
+    """Define an append-only log of pickled checkpoint records.
+
+    If a run is killed while appending, the partly written record is ignored
+    and removed the next time the journal is opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = []  # records found when opened
+        valid_size = 0
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    try:
+                        self.records.append(pickle.load(f))
+                    except (EOFError, pickle.UnpicklingError, ValueError):
+                        break
+                    valid_size = f.tell()
+        except FileNotFoundError:
+            return
+        if valid_size < os.path.getsize(path):
+            with open(path, 'ab') as f:
+                f.truncate(valid_size)
+
+    def append(self, record):
+        """Durably add a record to the end of the journal."""
+        with open(self.path, 'ab') as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
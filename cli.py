@@ -0,0 +1,276 @@
+"""Run No Thanks games, competitions, training and benchmarks.
+
+Usage: python cli.py {play,compete,worker,train,bench} [options]
+
+Heavy dependencies (pandas, networkx) are only imported by the
+subcommands that need them so that short runs and worker processes start fast.
+"""
+
+import argparse
+from ast import literal_eval
+from contextlib import contextmanager
+import logging
+import os
+import sys
+from time import time
+
+import nothanks
+
+DEFAULT_STRATEGIES = ['nothanks', 'threshold', 'sequence_threshold']
+
+
+def parse_strategy(text):
+    """Parse a strategy from the command line.
+
+    Strategies are given as a module name, optionally followed by Player
+    arguments, e.g. threshold or threshold:threshold=12.
+    """
+    module, _, arguments = text.partition(':')
+    if not arguments:
+        return module
+    params = {}
+    for argument in arguments.split(','):
+        key, _, value = argument.partition('=')
+        try:
+            params[key] = literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    return module, params
+
+
+def parse_address(text):
+    """Parse a host:port address from the command line; the host defaults to localhost."""
+    host, _, port = text.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def get_authkey():
+    """Return the key distributed workers authenticate with, from NOTHANKS_AUTHKEY.
+
+    Without it the public default key is used, which only works on this machine.
+    """
+    import distributed
+    authkey = os.environ.get('NOTHANKS_AUTHKEY')
+    return distributed.AUTHKEY if authkey is None else authkey.encode()
+
+
+def check_args(parser, args):
+    """Exit with a usage error for option combinations that cannot work."""
+    if args.command == 'compete' and args.serve is not None:
+        conflicts = [option for option, value in [('--cache', args.cache),
+                                                  ('--record', args.record),
+                                                  ('--checkpoint', args.checkpoint)]
+                     if value is not None]
+        if conflicts:
+            parser.error('--serve cannot be combined with {}'.format(', '.join(conflicts)))
+    address = args.serve if args.command == 'compete' else getattr(args, 'address', None)
+    if address is not None and 'NOTHANKS_AUTHKEY' not in os.environ:
+        import distributed
+        if not distributed.is_loopback(address[0]):
+            parser.error('set NOTHANKS_AUTHKEY to use {}:{} beyond this machine'
+                         .format(*address))
+
+
+def set_log_level(names, level):
+    """Log the named modules to stdout at level."""
+    for name in names:
+        logger = logging.getLogger(name)
+        logger.setLevel(level=level)
+        logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+@contextmanager
+def profiling(args, strategies):
+    """Profile the enclosed code and print a report if args.profile is set."""
+    if not args.profile:
+        yield
+        return
+    import telemetry
+    with telemetry.Profiler(strategies) as profiler:
+        yield
+    profiler.report()
+
+
+def play_command(args):
+    """Play a single game and print the results."""
+    set_log_level(['nothanks'], logging.DEBUG if args.verbose else logging.WARNING)
+    players = [nothanks.make_player(s) for s in args.strategies]
+    names = {id(p): nothanks.strategy_name(s) for s, p in zip(args.strategies, players)}
+    winners, scores = nothanks.Game(players).run()
+    for player_id, score in scores.items():
+        print('{:30} {:4}{}'.format(names[player_id], score,
+                                    ' (winner)' if player_id in winners else ''))
+
+
+def compete_command(args):
+    """Run a competition and print the results."""
+    import compete
+    modules = [s if isinstance(s, str) else s[0] for s in args.strategies]
+    set_log_level(['nothanks'] + modules, logging.WARNING)
+    options = {'game_sizes': args.sizes,
+               'checkpoint_path': args.checkpoint,
+               'checkpoint_every': args.checkpoint_every,
+               'print_progress': not args.quiet,
+               'metrics_path': args.metrics,
+               'starting_coins': args.coins,
+               'low_card': args.low_card,
+               'high_card': args.high_card,
+               'discard': args.discard}
+    game_options = {k: options[k] for k in ['starting_coins', 'low_card',
+                                            'high_card', 'discard']}
+    start = time()
+    with profiling(args, args.strategies):
+        if args.serve is not None:
+            import distributed
+            authkey = get_authkey()
+            coordinator = distributed.Coordinator(
+                args.strategies, args.rounds, game_sizes=args.sizes,
+                games_per_unit=args.unit_games, address=args.serve, authkey=authkey,
+                lease_timeout=args.lease_timeout,
+                print_progress=not args.quiet, metrics_path=args.metrics, **game_options)
+            print('Serving work units on {}:{}'.format(*coordinator.address), file=sys.stderr)
+            distributed.start_workers(coordinator.address, args.local_workers, authkey)
+            results = compete.to_frame(coordinator.run())
+        elif args.cache is not None:
+            import results_cache
+            with results_cache.ResultsCache(args.cache) as cache:
+                results = compete.to_frame(compete.run_incremental_competition(
+                    args.strategies, cache, games_per_table=args.table_games,
+                    game_sizes=args.sizes, print_progress=not args.quiet,
+                    **game_options))
+        elif args.record is None:
+            results = compete.compete(args.strategies, args.rounds, **options)
+        else:
+            import records
+            layout = records.RecordLayout(
+                max_players=max(args.sizes),
+                max_cards=args.high_card + 1 - args.low_card - args.discard,
+                starting_coins=args.coins)
+            with records.RecordWriter(args.record, layout) as recorder:
+                results = compete.compete(args.strategies, args.rounds,
+                                          recorder=recorder, **options)
+    elapsed = time() - start
+    print(results)
+    print('Ran in {:.2f} seconds'.format(elapsed))
+
+
+def worker_command(args):
+    """Play work units for a competition served with compete --serve."""
+    import distributed
+    played = distributed.work(args.address, get_authkey())
+    print('Played {} work units'.format(played))
+
+
+def train_command(args):
+    """Train the CRM player and print its strategy."""
+    import mini_nothanks_crm
+    import pandas as pd
+    tree = mini_nothanks_crm.game_tree(num_players=args.players,
+                                       starting_coins=args.coins,
+                                       low_card=args.low_card,
+                                       high_card=args.high_card,
+                                       discard=args.discard)
+    start = time()
+    with profiling(args, ['mini_nothanks_crm']):
+        tree.train(args.games, print_progress=not args.quiet,
+                   checkpoint_path=args.checkpoint,
+                   checkpoint_every=args.checkpoint_every,
+                   metrics_path=args.metrics)
+    elapsed = time() - start
+    pd.set_option('display.width', 9999)
+    pd.set_option('display.max_rows', 9999)
+    print(pd.DataFrame(tree.reduce()).transpose())
+    print('Took {:.2f} seconds.'.format(elapsed))
+
+
+def bench_command(args):
+    """Run the engine benchmarks."""
+    import bench
+    getattr(bench, 'bench_' + args.benchmark)()
+
+
+def get_parser():
+    """Return the command line argument parser."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    parser_play = subparsers.add_parser('play', help=play_command.__doc__)
+    parser_play.add_argument('strategies', nargs='*', type=parse_strategy,
+                             default=DEFAULT_STRATEGIES)
+    parser_play.add_argument('-v', '--verbose', action='store_true',
+                             help='log every turn')
+    parser_play.set_defaults(run=play_command)
+
+    parser_compete = subparsers.add_parser('compete', help=compete_command.__doc__)
+    parser_compete.add_argument('strategies', nargs='*', type=parse_strategy,
+                                default=DEFAULT_STRATEGIES)
+    parser_compete.add_argument('-n', '--rounds', type=int, default=1000,
+                                help='games per game size')
+    parser_compete.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5],
+                                help='numbers of players per game')
+    parser_compete.add_argument('--coins', type=int, default=11)
+    parser_compete.add_argument('--low-card', type=int, default=3)
+    parser_compete.add_argument('--high-card', type=int, default=35)
+    parser_compete.add_argument('--discard', type=int, default=9)
+    parser_compete.add_argument('--cache', help='play every table of strategies, reusing '
+                                'the results cached in this file')
+    parser_compete.add_argument('--table-games', type=int, default=100,
+                                help='games per table when using --cache')
+    parser_compete.add_argument('--serve', type=parse_address, metavar='HOST:PORT',
+                                help='hand out work units to workers connecting here '
+                                '(port 0 picks a free port)')
+    parser_compete.add_argument('--unit-games', type=int, default=100,
+                                help='games per work unit when using --serve')
+    parser_compete.add_argument('--lease-timeout', type=float, default=60,
+                                help='seconds without word from a worker before its work '
+                                'unit is handed to another (must exceed one game)')
+    parser_compete.add_argument('--local-workers', type=int, default=0,
+                                help='workers to start on this machine when using --serve')
+    parser_compete.add_argument('--record', help='log every game to this file')
+    parser_compete.add_argument('--checkpoint', help='checkpoint file to save to and resume from')
+    parser_compete.add_argument('--checkpoint-every', type=int, default=10000)
+    parser_compete.add_argument('--metrics', help='write throughput metrics to this file')
+    parser_compete.add_argument('--profile', action='store_true',
+                                help='report CPU time and memory by strategy and engine phase')
+    parser_compete.add_argument('-q', '--quiet', action='store_true',
+                                help='do not show progress')
+    parser_compete.set_defaults(run=compete_command)
+
+    parser_worker = subparsers.add_parser('worker', help=worker_command.__doc__)
+    parser_worker.add_argument('address', type=parse_address, metavar='HOST:PORT')
+    parser_worker.set_defaults(run=worker_command)
+
+    parser_train = subparsers.add_parser('train', help=train_command.__doc__)
+    parser_train.add_argument('-n', '--games', type=int, default=10000)
+    parser_train.add_argument('--players', type=int, default=2)
+    parser_train.add_argument('--coins', type=int, default=2)
+    parser_train.add_argument('--low-card', type=int, default=1)
+    parser_train.add_argument('--high-card', type=int, default=4)
+    parser_train.add_argument('--discard', type=int, default=1)
+    parser_train.add_argument('--checkpoint', help='journal file to save to and resume from')
+    parser_train.add_argument('--checkpoint-every', type=int, default=1000)
+    parser_train.add_argument('--metrics', help='write throughput metrics to this file')
+    parser_train.add_argument('--profile', action='store_true',
+                              help='report CPU time and memory by strategy and engine phase')
+    parser_train.add_argument('-q', '--quiet', action='store_true',
+                              help='do not show progress')
+    parser_train.set_defaults(run=train_command)
+
+    parser_bench = subparsers.add_parser('bench', help=bench_command.__doc__)
+    parser_bench.add_argument('benchmark', choices=['notify', 'rollouts', 'imports',
+                                                    'scaling', 'ladder'])
+    parser_bench.set_defaults(run=bench_command)
+
+    return parser
+
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    check_args(parser, args)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
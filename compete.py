@@ -1,45 +1,193 @@
 """Define the No Thanks multi-game competition."""
 
-from importlib import import_module
+from collections import Counter
+from contextlib import contextmanager
+from itertools import combinations_with_replacement
+from math import factorial
+import random
 from random import choices  # use sample for sampling without replacement
-from progress.bar import ChargingBar as ProgressBar
 from time import time
 
 import logging
 import sys
 
-import pandas as pd
-
+import checkpoint
 import nothanks
+import results_cache
+import telemetry
+
+# pandas is slow to import, so it is only imported when used.
+
 
+def compete(strategies, num_rounds=1000, **options):
+    """Create and run No Thanks competition and return a DataFrame of results.
 
-def compete(strategies, num_rounds=1000):
-    """Create and run No Thanks competition."""
+    See run_competition for the arguments.
+    """
+    return to_frame(run_competition(strategies, num_rounds, **options))
 
-    # Play 3, 4, and 5 player games
-    game_sizes = [3, 4, 5]
 
+def to_frame(results):
+    """Return competition results as a DataFrame with totals."""
+    import pandas as pd
+    results = pd.DataFrame(results)
+    results['combined'] = results.sum(axis=1)
+    results.loc['total', :] = results.sum(axis=0)
+    return results
+
+
+def run_competition(strategies, num_rounds=1000, game_sizes=(3, 4, 5),
+                    recorder=None, checkpoint_path=None, checkpoint_every=10000,
+                    print_progress=True, metrics_path=None, **game_options):
+    """Create and run No Thanks competition.
+
+    Return a dictionary of game size to dictionary of strategy name to the
+    strategy's share of the wins minus an even share, per game.
+
+    strategies: a list of strategies as accepted by nothanks.make_player
+    game_sizes: the numbers of players per game to play num_rounds games of
+    recorder: an optional records.RecordWriter to log every game to
+    checkpoint_path: if given, save progress here every checkpoint_every games
+                     and resume from it if it exists; a resumed competition
+                     returns the same results as an uninterrupted one, and
+                     resuming with different settings raises ValueError
+    print_progress: report progress and throughput on stderr
+    metrics_path: if given, periodically write throughput metrics here
+    game_options: keyword arguments for nothanks.Game (deck and coins)
+    """
     # A dictionary of scores
     results = {}
     for num_players in game_sizes:
         results[num_players] = {}
         for strategy in strategies:
-            results[num_players][strategy] = 0
-
-    for num_players in game_sizes:
-        for _ in ProgressBar('Playing {}-player games'.format(num_players)).iter(range(num_rounds)):
+            results[num_players][nothanks.strategy_name(strategy)] = 0
+
+    # Where to pick up from (the start, unless resuming)
+    start_size, start_round = 0, 0
+    # The settings a checkpoint must have been saved with to be resumed
+    run = {'strategies': list(strategies), 'num_rounds': num_rounds,
+           'game_sizes': list(game_sizes), 'game_options': game_options}
+    saved = None if checkpoint_path is None else checkpoint.load(checkpoint_path)
+    if saved is not None:
+        checkpoint.check_run(checkpoint_path, saved.get('run'), run)
+        results = saved['results']
+        start_size, start_round = saved['position']
+        random.setstate(saved['random'])
+        if recorder is not None and saved['records'] is not None:
+            recorder.truncate(saved['records'])
+
+    def save_checkpoint(size_index, round_index):
+        if recorder is not None:
+            recorder.flush()
+        checkpoint.save(checkpoint_path, {
+            'run': run, 'results': results, 'position': (size_index, round_index),
+            'random': random.getstate(),
+            'records': None if recorder is None else recorder.count})
+
+    remaining = (len(game_sizes) - start_size) * num_rounds - start_round
+    throughput = telemetry.Throughput('compete', total=remaining,
+                                      metrics_path=metrics_path,
+                                      stream=sys.stderr if print_progress else None)
+    for size_index in range(start_size, len(game_sizes)):
+        num_players = game_sizes[size_index]
+        first_round = start_round if size_index == start_size else 0
+        for round_index in range(first_round, num_rounds):
+            if checkpoint_path is not None and round_index % checkpoint_every == 0:
+                save_checkpoint(size_index, round_index)
             selected_strategies = choices(strategies, k=num_players)
-            players = [import_module(s).Player() for s in selected_strategies]
-            winners, _ = nothanks.Game(players).run()
+            players = [nothanks.make_player(s) for s in selected_strategies]
+            game = nothanks.Game(players, **game_options)
+            winners, _ = game.run()
+            throughput.update(games=1, decisions=len(game.decisions))
+            if recorder is not None:
+                recorder.write(game, {id(p): nothanks.strategy_name(s) for s, p
+                                      in zip(selected_strategies, players)})
 
             for strategy, player in zip(selected_strategies, players):
-                results[num_players][strategy] -= 1 / num_players / num_rounds
+                name = nothanks.strategy_name(strategy)
+                results[num_players][name] -= 1 / num_players / num_rounds
                 if id(player) in winners:
-                    results[num_players][strategy] += 1 / len(winners) / num_rounds
+                    results[num_players][name] += 1 / len(winners) / num_rounds
 
-    results = pd.DataFrame(results)
-    results['combined'] = results.sum(axis=1)
-    results.loc['total', :] = results.sum(axis=0)
+    throughput.close()
+    if checkpoint_path is not None:
+        save_checkpoint(len(game_sizes), 0)
+
+    return results
+
+
+@contextmanager
+def seeded_random(seed):
+    """Seed the random module for the enclosed code, then restore its state."""
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+
+
+def run_table(strategies, num_games, seed, game_options):
+    """Play games with one player per strategy and return each seat's mean payoff.
+
+    A payoff is the player's share of the win minus an even share. The games
+    are seeded so replaying a table gives the same results.
+    """
+    rng = random.Random(seed)
+    totals = [0] * len(strategies)
+    with seeded_random(seed):  # for strategies that use the random module
+        for _ in range(num_games):
+            players = [nothanks.make_player(s) for s in strategies]
+            winners, _ = nothanks.Game(players, rng=rng, **game_options).run()
+            for seat, player in enumerate(players):
+                totals[seat] -= 1 / len(players)
+                if id(player) in winners:
+                    totals[seat] += 1 / len(winners)
+    return [total / num_games for total in totals]
+
+
+def get_table_probability(table, num_strategies):
+    """Return the chance of seating this multiset of strategies by uniform sampling."""
+    probability = factorial(len(table)) / num_strategies ** len(table)
+    for count in Counter(table).values():
+        probability /= factorial(count)
+    return probability
+
+
+def run_incremental_competition(strategies, cache, games_per_table=100,
+                                game_sizes=(3, 4, 5), seed=0,
+                                print_progress=True, **game_options):
+    """Create and run No Thanks competition, reusing cached table results.
+
+    Rather than seating strategies at random, every combination of strategies
+    is played games_per_table times (with its own seed) and weighted by its
+    chance of being seated, so results have the same meaning as those of
+    run_competition. Tables whose results are in the cache (a
+    results_cache.ResultsCache) are not replayed, so adding or changing a
+    strategy only plays the tables it is part of. Note that the number of
+    tables grows quickly with the number of strategies and the game size.
+    """
+    by_key = {results_cache.strategy_key(s): s for s in strategies}
+    sorted_keys = sorted(by_key)
+    throughput = telemetry.Throughput('compete', stream=sys.stderr if print_progress else None)
+
+    results = {}
+    for num_players in game_sizes:
+        results[num_players] = {nothanks.strategy_name(s): 0 for s in strategies}
+        for table in combinations_with_replacement(sorted_keys, num_players):
+            key = results_cache.table_key(table, games_per_table, seed, game_options)
+            payoffs = cache.get(key)
+            if payoffs is None:
+                # Each table gets its own seed, derived from its key
+                payoffs = run_table([by_key[k] for k in table], games_per_table,
+                                    int(key[:8], 16), game_options)
+                cache.put(key, payoffs)
+                throughput.update(games=games_per_table)
+            probability = get_table_probability(table, len(sorted_keys))
+            for strategy_key, payoff in zip(table, payoffs):
+                name = nothanks.strategy_name(by_key[strategy_key])
+                results[num_players][name] += probability * payoff
+    throughput.close()
     return results
 
 
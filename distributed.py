@@ -0,0 +1,334 @@
+"""Run a No Thanks competition across many machines.
+
+A Coordinator splits the competition into work units (batches of seeded games
+of one size) and hands them out over a socket to Workers, which may run on any
+machine that has the same code. A worker sends back the total payoff of each
+strategy over its unit, and a heartbeat between games to renew its lease on
+the unit. A unit whose lease expires, or whose worker disconnects, is handed
+out again (a late result is still accepted), and the run fails once a unit has
+been handed out again max_retries times. Totals are merged in unit order, so
+the results are exactly those of run_units in a single process, however the
+units were spread.
+
+Messages are pickled, so anyone holding the authkey can run code on the other
+end. The default authkey is public, so it is refused for any address beyond
+this machine.
+"""
+
+from collections import Counter, namedtuple
+import ipaddress
+import logging
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Listener
+import random
+import socket
+import sys
+import threading
+from time import perf_counter
+
+import compete
+import nothanks
+import results_cache
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+AUTHKEY = b'nothanks'
+
+# A batch of games: num_games games of num_players players seeded by seed
+Unit = namedtuple('Unit', ['unit_id', 'num_players', 'num_games', 'seed'])
+
+
+def get_units(num_rounds, game_sizes, games_per_unit, seed):
+    """Return the work units of a competition, in order."""
+    rng = random.Random(seed)
+    units = []
+    for num_players in game_sizes:
+        for start in range(0, num_rounds, games_per_unit):
+            units.append(Unit(len(units), num_players,
+                              min(games_per_unit, num_rounds - start), rng.getrandbits(32)))
+    return units
+
+
+def play_unit(strategies, unit, game_options, heartbeat=None):
+    """Play a unit and return the total payoff of each strategy and the decisions made.
+
+    A payoff is the player's share of the win minus an even share.
+    heartbeat: if given, called after every game
+    """
+    rng = random.Random(unit.seed)
+    totals = {nothanks.strategy_name(s): 0 for s in strategies}
+    decisions = 0
+    with compete.seeded_random(unit.seed):  # for strategies that use the random module
+        for _ in range(unit.num_games):
+            selected_strategies = rng.choices(strategies, k=unit.num_players)
+            players = [nothanks.make_player(s) for s in selected_strategies]
+            game = nothanks.Game(players, rng=rng, **game_options)
+            winners, _ = game.run()
+            decisions += len(game.decisions)
+            for strategy, player in zip(selected_strategies, players):
+                name = nothanks.strategy_name(strategy)
+                totals[name] -= 1 / unit.num_players
+                if id(player) in winners:
+                    totals[name] += 1 / len(winners)
+            if heartbeat is not None:
+                heartbeat()
+    return totals, decisions
+
+
+def is_loopback(host):
+    """Return whether a host name or address only reaches this machine."""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def check_authkey(address, authkey):
+    """Raise ValueError if the public default authkey would be used beyond this machine."""
+    host, port = address
+    if authkey == AUTHKEY and not is_loopback(host):
+        raise ValueError('Set an authkey other than the default to use {}:{}'.format(host, port))
+
+
+def get_strategy_keys(strategies):
+    """Return the identities of strategies, which change with their code."""
+    return [results_cache.strategy_key(s) for s in strategies]
+
+
+def merge(strategies, units, totals, num_rounds):
+    """Return competition results (as run_competition) from each unit's totals."""
+    results = {}
+    for unit in units:
+        size_results = results.setdefault(
+            unit.num_players, {nothanks.strategy_name(s): 0 for s in strategies})
+        for name, total in totals[unit.unit_id].items():
+            size_results[name] += total
+    for size_results in results.values():
+        for name in size_results:
+            size_results[name] /= num_rounds
+    return results
+
+
+def run_units(strategies, num_rounds=1000, game_sizes=(3, 4, 5), games_per_unit=100,
+              seed=0, **game_options):
+    """Play every unit of a competition in this process and return the results."""
+    units = get_units(num_rounds, game_sizes, games_per_unit, seed)
+    totals = {unit.unit_id: play_unit(strategies, unit, game_options)[0] for unit in units}
+    return merge(strategies, units, totals, num_rounds)
+
+
+class Coordinator():
+    """Define a server that hands out the units of a competition to workers.
+
+    Create it, start workers with its address, then call run.
+    """
+
+    def __init__(self, strategies, num_rounds=1000, game_sizes=(3, 4, 5),
+                 games_per_unit=100, seed=0, address=('localhost', 0), authkey=AUTHKEY,
+                 lease_timeout=60, max_retries=5, print_progress=True, metrics_path=None,
+                 **game_options):
+        """Create coordinator and start listening.
+
+        address: the (host, port) to listen on; port 0 picks a free port
+        authkey: the key workers must share; required beyond this machine
+        lease_timeout: seconds without a heartbeat (sent after every game)
+                       before a worker's unit is handed to another worker; it
+                       must be longer than any one game
+        max_retries: times a unit may be handed out again before run fails
+        See run_competition for the other arguments.
+        """
+        check_authkey(address, authkey)
+        self.strategies = strategies
+        self.num_rounds = num_rounds
+        self.game_options = game_options
+        self.authkey = authkey
+        self.lease_timeout = lease_timeout
+        self.max_retries = max_retries
+        self.units = get_units(num_rounds, game_sizes, games_per_unit, seed)
+        self.pending = list(reversed(self.units))  # units to hand out, next last
+        self.totals = {}  # unit id -> totals
+        self.retries = 0
+        self.unit_retries = Counter()  # unit id -> times handed out again
+        self.failed = None  # the unit that was retried too often, if any
+        self.condition = threading.Condition()
+        self.throughput = telemetry.Throughput(
+            'compete', total=len(game_sizes) * num_rounds, metrics_path=metrics_path,
+            stream=sys.stderr if print_progress else None)
+        self.listener = Listener(address, authkey=authkey)
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    @property
+    def finished(self):
+        return len(self.totals) == len(self.units)
+
+    @property
+    def stopped(self):
+        return self.finished or self.failed is not None
+
+    def run(self):
+        """Serve units until all are done and return the results (as run_competition).
+
+        Raise RuntimeError if a unit was handed out again more than max_retries times.
+        """
+        accepter = threading.Thread(target=self.accept, daemon=True)
+        accepter.start()
+        with self.condition:
+            while not self.stopped:
+                self.condition.wait()
+        # Wake the accepting thread so it can stop listening
+        Client(self.address, authkey=self.authkey).close()
+        accepter.join()
+        self.throughput.close()
+        if self.failed is not None:
+            raise RuntimeError('Unit {} was handed out {} times without a result; workers may be '
+                               'failing or lease_timeout may be shorter than a game'.format(
+                                   self.failed.unit_id, self.max_retries + 1))
+        return merge(self.strategies, self.units, self.totals, self.num_rounds)
+
+    def accept(self):
+        """Accept workers until the competition is finished."""
+        with self.listener:
+            while True:
+                connection = self.listener.accept()
+                if self.stopped:
+                    connection.close()
+                    return
+                threading.Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+    def next_unit(self):
+        """Return the next unit to hand out, waiting for retries, or None when finished."""
+        with self.condition:
+            while not self.pending and not self.stopped:
+                self.condition.wait()
+            return self.pending.pop() if self.pending and not self.stopped else None
+
+    def record(self, unit, totals, decisions):
+        """Merge a worker's result for unit, unless another worker's already was."""
+        with self.condition:
+            if unit.unit_id not in self.totals:
+                self.totals[unit.unit_id] = totals
+                self.throughput.update(games=unit.num_games, decisions=decisions)
+                if unit in self.pending:  # a late result for a unit handed out again
+                    self.pending.remove(unit)
+            self.condition.notify_all()
+
+    def release(self, unit):
+        """Hand out a unit again unless it is done, failing after max_retries."""
+        with self.condition:
+            if unit.unit_id not in self.totals and unit not in self.pending:
+                self.pending.append(unit)
+                self.retries += 1
+                self.unit_retries[unit.unit_id] += 1
+                if self.unit_retries[unit.unit_id] > self.max_retries:
+                    self.failed = unit
+            self.condition.notify_all()
+
+    def serve(self, connection):
+        """Hand units to one worker until finished or the worker is lost.
+
+        The worker sends None as a heartbeat while it plays a unit. If none
+        arrives within the lease timeout the unit is handed out again, but the
+        worker's result is still accepted if it comes first.
+        """
+        unit = None
+        released = False
+        try:
+            with connection:
+                connection.send((self.strategies, get_strategy_keys(self.strategies),
+                                 self.game_options, self.lease_timeout / 4))
+                unit = self.next_unit()
+                while unit is not None:
+                    connection.send(unit)
+                    released = False
+                    while True:
+                        if connection.poll(self.lease_timeout):
+                            message = connection.recv()
+                            if message is not None:
+                                self.record(unit, *message)
+                                break
+                        elif not released:
+                            released = True
+                            self.release(unit)
+                    unit = self.next_unit()
+                connection.send(None)
+        except (EOFError, OSError):
+            if unit is not None and not released:
+                self.release(unit)
+
+
+class Heartbeat():
+    """Define a callable that tells the coordinator a worker is still playing."""
+
+    def __init__(self, connection, interval):
+        self.connection = connection
+        self.interval = interval
+        self.last = perf_counter()
+
+    def __call__(self):
+        now = perf_counter()
+        if now - self.last >= self.interval:
+            self.connection.send(None)
+            self.last = now
+
+
+def work(address, authkey=AUTHKEY):
+    """Play units for the coordinator at address until it is finished.
+
+    If the connection is lost, reconnect; stop once the coordinator can no
+    longer be reached. Return the number of units played. The authkey is
+    required when the coordinator is on another machine.
+    """
+    check_authkey(address, authkey)
+    played = 0
+    connected = False
+    while True:
+        try:
+            connection = Client(address, authkey=authkey)
+        except OSError:
+            if not connected:
+                raise
+            break  # the coordinator has finished
+        connected = True
+        try:
+            with connection:
+                strategies, keys, game_options, heartbeat_interval = connection.recv()
+                if get_strategy_keys(strategies) != keys:
+                    raise RuntimeError('Strategy code differs from the coordinator\'s')
+                heartbeat = Heartbeat(connection, heartbeat_interval)
+                unit = connection.recv()
+                while unit is not None:
+                    totals, decisions = play_unit(strategies, unit, game_options, heartbeat)
+                    connection.send((totals, decisions))
+                    played += 1
+                    unit = connection.recv()
+            break
+        except (EOFError, OSError):
+            logger.warning('Lost the coordinator at {}:{}; reconnecting'.format(*address))
+    save_tablebases()
+    return played
+
+
+def save_tablebases():
+    """Save what endgame players learned, if any played in this process."""
+    # A worker may run in a forked process, which exits without running the
+    # exit handler that would do this
+    endgame = sys.modules.get('endgame')
+    if endgame is not None:
+        endgame.save_tablebases()
+
+
+def start_workers(address, count, authkey=AUTHKEY):
+    """Start count worker processes on this machine and return them.
+
+    Workers are spawned rather than forked so that they do not hold a copy of
+    a coordinator's listening socket, which would stop it closing.
+    """
+    context = get_context('spawn')
+    workers = [context.Process(target=work, args=(address, authkey)) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
@@ -0,0 +1,221 @@
+"""Solve the last few cards of a No Thanks game exactly.
+
+Near the end of a game so few cards remain that every line of play can be
+searched. The Tablebase solves endgame positions by dynamic programming: each
+player makes the choice that maximizes their own expected payoff (their share
+of the win minus an even share), assuming the other players do the same and
+that the next card is equally likely to be any card not yet seen (the deck and
+the discards are indistinguishable).
+
+Positions are encoded compactly so equivalent positions share an entry:
+    (card, pot, unseen, deck_size, players)
+where unseen is a bitmask of card values not yet seen, deck_size is the number
+of cards left to deal, and players holds a (score, coins, held) tuple per
+player in order of play starting with the player to act. score is the card
+score so far (without coins) and held is a bitmask of only the held cards next
+to a card still in play or unseen, since only those can change a score.
+
+Players share a tablebase per path. Tablebases loaded from a path save their
+new decisions there when the process exits, so later runs start with the
+positions already solved. Saves merge with the decisions already saved, so
+several processes can share a path. Forked worker processes (such as those of
+a multiprocessing.Pool) exit without running exit handlers, so they must call
+save_tablebases themselves; distributed workers do.
+"""
+
+import atexit
+import os
+
+import checkpoint
+import sequence_threshold
+
+
+# Positions a tablebase holds by default (each takes about 300 bytes of memory)
+MAX_POSITIONS = 1000000
+
+
+class Tablebase():
+    """Define a lookup table of solved endgame decisions.
+
+    Decisions are looked up in constant time. Positions not yet in the table
+    are solved on demand and added until it holds max_positions; after that
+    they are solved every time. Save the table to reuse it across runs.
+    """
+
+    def __init__(self, path=None, max_positions=MAX_POSITIONS):
+        """Create tablebase, loading the decisions saved at path if it exists."""
+        self.path = path
+        self.max_positions = max_positions
+        self.decisions = {}  # position -> whether to take the card
+        self.values = {}  # position -> expected payoffs in order of play
+        self.changed = False  # whether there are decisions not yet saved
+        if path is not None and os.path.exists(path):
+            self.decisions = checkpoint.load(path)
+
+    def save(self, path=None):
+        """Save the decisions to path (by default the path loaded from).
+
+        Decisions already saved there, e.g. by other processes, are kept.
+        """
+        save_path = self.path if path is None else path
+        with checkpoint.lock(save_path):
+            decisions = checkpoint.load(save_path) or {}
+            decisions.update(self.decisions)
+            checkpoint.save(save_path, decisions)
+        if save_path == self.path:
+            self.changed = False
+
+    def decide(self, position):
+        """Return whether the player to act should take the card."""
+        _, _, _, _, players = position
+        if players[0][1] == 0:  # no coins, no choice
+            return True
+        decision = self.decisions.get(position)
+        if decision is None:
+            decisions = self.decisions
+            if len(decisions) >= self.max_positions:
+                # Solve in a scratch table so a full table stops growing
+                self.decisions = {}
+            else:
+                self.changed = True
+            self.solve(position)
+            decision = self.decisions[position]
+            self.decisions = decisions
+            # Positions rarely repeat across games, so only keep the decisions
+            self.values = {}
+        return decision
+
+    def solve(self, position):
+        """Return the expected payoff of each player, in order of play."""
+        value = self.values.get(position)
+        if value is not None:
+            return value
+        take = self.solve_take(position)
+        card, pot, unseen, deck_size, players = position
+        score, coins, held = players[0]
+        if coins == 0:
+            value = take
+        else:
+            passer = (score, coins - 1, held)
+            after_pass = self.solve((card, pot + 1, unseen, deck_size,
+                                     players[1:] + (passer,)))
+            # The passing player moved from first to last
+            after_pass = after_pass[-1:] + after_pass[:-1]
+            took = take[0] >= after_pass[0]
+            self.decisions[position] = took
+            value = take if took else after_pass
+        self.values[position] = value
+        return value
+
+    def solve_take(self, position):
+        """Return the expected payoffs if the player to act takes the card."""
+        card, pot, unseen, deck_size, players = position
+        score, coins, held = players[0]
+        if card == 0 or not held & (1 << (card - 1)):
+            score += card
+        if held & (1 << (card + 1)):
+            score -= card + 1
+        players = ((score, coins + pot, held | (1 << card)),) + players[1:]
+        if deck_size == 0:
+            return get_payoffs(players)
+        # Average over the next card, which the same player is offered
+        next_cards = list(get_cards(unseen))
+        total = [0] * len(players)
+        for next_card in next_cards:
+            value = self.solve(encode(next_card, 0, unseen & ~(1 << next_card),
+                                      deck_size - 1, players))
+            total = [t + v for t, v in zip(total, value)]
+        return tuple(t / len(next_cards) for t in total)
+
+
+def get_cards(mask):
+    """Yield the card values in a bitmask."""
+    card = 0
+    while mask:
+        if mask & 1:
+            yield card
+        mask >>= 1
+        card += 1
+
+
+def get_payoffs(players):
+    """Return each player's share of the win minus an even share."""
+    scores = [score - coins for score, coins, _ in players]
+    winning_score = min(scores)
+    num_winners = scores.count(winning_score)
+    return tuple((1 / num_winners if s == winning_score else 0) - 1 / len(scores)
+                 for s in scores)
+
+
+def encode(card, pot, unseen, deck_size, players):
+    """Return the position, dropping held cards that can no longer matter."""
+    in_play = unseen | (1 << card)
+    neighbors = (in_play << 1) | (in_play >> 1)
+    return (card, pot, unseen, deck_size,
+            tuple((score, coins, held & neighbors) for score, coins, held in players))
+
+
+def encode_view(view):
+    """Return the position of a game from a nothanks.GameView."""
+    order = view.player_order
+    first = order.index(view.current_player)
+    order = order[first:] + order[:first]
+    seen = 1 << view.card
+    players = []
+    for player_id in order:
+        cards = view.cards(player_id)
+        held = 0
+        for card in cards:
+            held |= 1 << card
+        seen |= held
+        players.append((sequence_threshold.get_score(cards), view.coins(player_id), held))
+    unseen = 0
+    for card in range(view.low_card, view.high_card + 1):
+        if not seen & (1 << card):
+            unseen |= 1 << card
+    return encode(view.card, view.pot, unseen, view.deck_size, players)
+
+
+# Tablebases shared by players, by path (None for one that is never saved)
+TABLEBASES = {}
+
+
+def get_tablebase(path=None):
+    """Return the tablebase shared by all players using path, loading it once."""
+    tablebase = TABLEBASES.get(path)
+    if tablebase is None:
+        tablebase = TABLEBASES[path] = Tablebase(path)
+    return tablebase
+
+
+@atexit.register
+def save_tablebases():
+    """Save the new decisions of every shared tablebase that has a path."""
+    for path, tablebase in TABLEBASES.items():
+        if path is not None and tablebase.changed:
+            tablebase.save()
+
+
+class Player(sequence_threshold.Player):
+    """Play the sequence threshold strategy, then play the endgame perfectly.
+
+    cards: the number of cards (including the one in play) left when the
+           tablebase takes over; each extra card makes solving much slower
+    tablebase: a Tablebase, or the path of a saved one to share with every
+               player using the same path (see get_tablebase)
+    """
+
+    def __init__(self, threshold=10, cards=2, tablebase=None):
+        super().__init__(threshold)
+        self.endgame_cards = cards
+        if not isinstance(tablebase, Tablebase):
+            tablebase = get_tablebase(tablebase)
+        self.tablebase = tablebase
+
+    def play(self, card, pot):
+        if self.view.deck_size < self.endgame_cards:
+            return self.tablebase.decide(encode_view(self.view))
+        return super().play(card, pot)
+
+    def __str__(self):
+        return '<Endgame {} player>'.format(self.endgame_cards)
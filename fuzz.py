@@ -0,0 +1,243 @@
+"""Check alternative game engines against the reference nothanks.Game.
+
+An engine is a function that plays a Case (a fixed deck, seating and script
+of decisions) and returns an Outcome: the state before every turn, the final
+state, the scores and the winners, all by seat. fuzz plays random cases
+through the reference and the engine under test and compares every turn.
+When they differ, shrink reduces the case to a minimal one that still differs.
+"""
+
+from collections import namedtuple
+from multiprocessing import Pool
+import random
+
+import nothanks
+
+# A game to play. Cards are dealt in deck order and discarded cards are never
+# dealt; together they are every card from low_card to high_card. Seats are in
+# order of play. Turn i takes the card if decisions[i] is True (turns beyond the
+# script pass), unless the player has no coins and must take it.
+Case = namedtuple('Case', ['num_players', 'starting_coins', 'low_card', 'high_card',
+                           'deck', 'discarded', 'decisions'])
+
+# The result of playing a case. Each state in trace (before each turn, then
+# the final state) is (seat to play, card, pot, coins by seat, hands by seat).
+Outcome = namedtuple('Outcome', ['trace', 'scores', 'winners'])
+
+
+class ScriptedPlayer(nothanks.Player):
+    """Define a player that takes or passes according to the case's script."""
+
+    def __init__(self, script):
+        self.script = script
+
+    def play(self, card, pot):
+        return self.script.decide()
+
+    def update(self, player_id, card, pot, action):
+        # Every player is notified, but only the first one records the turn
+        if self is self.script.game.players[0]:
+            self.script.record()
+
+
+class Script():
+    """Define the shared script and record of a game."""
+
+    def __init__(self, decisions):
+        self.decisions = decisions
+        self.game = None
+        self.trace = []
+
+    def decide(self):
+        turn = len(self.trace)
+        return turn < len(self.decisions) and self.decisions[turn]
+
+    def record(self):
+        self.trace.append(get_state(self.game))
+
+
+class ArrangingRandom():
+    """Define a stand-in for random that arranges the case instead of shuffling."""
+
+    def __init__(self, case):
+        self.case = case
+        self.calls = 0
+
+    def shuffle(self, items):
+        self.calls += 1
+        if self.calls == 2:  # players are shuffled first (left in seat order), then the deck
+            # The game discards from the front of the deck and deals from the end
+            items[:] = list(self.case.discarded) + list(reversed(self.case.deck))
+
+
+def create_game(case, players):
+    """Return a nothanks.Game arranged as in the case."""
+    return nothanks.Game(players, starting_coins=case.starting_coins,
+                         low_card=case.low_card, high_card=case.high_card,
+                         discard=len(case.discarded), rng=ArrangingRandom(case))
+
+
+def get_state(game):
+    """Return the state of a nothanks.Game by seat."""
+    states = [game.state[id(p)] for p in game.players]
+    seat = None if game.current_player is None else game.players.index(game.current_player)
+    return (seat, game.card, game.pot, tuple(s['coins'] for s in states),
+            tuple(tuple(s['cards']) for s in states))
+
+
+def get_outcome(game, trace):
+    """Return the Outcome of a finished nothanks.Game."""
+    winners, scores = game.get_results()
+    ids = [id(p) for p in game.players]
+    return Outcome(trace + [get_state(game)], tuple(scores[i] for i in ids),
+                   tuple(seat for seat, i in enumerate(ids) if i in winners))
+
+
+def reference(case):
+    """Play a case with nothanks.Game, asking and notifying scripted players."""
+    script = Script(case.decisions)
+    players = [ScriptedPlayer(script) for _ in range(case.num_players)]
+    script.game = create_game(case, players)
+    script.game.run()
+    return get_outcome(script.game, script.trace)
+
+
+def step_engine(case):
+    """Play a case with nothanks.Game's step API."""
+    game = create_game(case, [nothanks.Player() for _ in range(case.num_players)])
+    game.setup_game()
+    trace = []
+    while game.current_player is not None:
+        turn = len(trace)
+        trace.append(get_state(game))
+        game.step(turn < len(case.decisions) and case.decisions[turn])
+    return get_outcome(game, trace)
+
+
+def compare(case, engine):
+    """Return a description of the first difference from the reference, or None."""
+    expected = reference(case)
+    try:
+        actual = engine(case)
+    except Exception as e:
+        return 'engine raised {!r}'.format(e)
+    for turn, (want, got) in enumerate(zip(expected.trace, actual.trace)):
+        if want != got:
+            return 'turn {}: expected state {} but got {}'.format(turn, want, got)
+    if len(expected.trace) != len(actual.trace):
+        return 'expected {} states but got {}'.format(len(expected.trace), len(actual.trace))
+    if expected.scores != actual.scores:
+        return 'expected scores {} but got {}'.format(expected.scores, actual.scores)
+    if expected.winners != actual.winners:
+        return 'expected winners {} but got {}'.format(expected.winners, actual.winners)
+    return None
+
+
+def random_case(rng, max_players=6, max_cards=40, max_coins=12):
+    """Return a random Case."""
+    num_players = rng.randint(1, max_players)
+    low_card = rng.randint(1, 5)
+    high_card = low_card + rng.randint(0, max_cards - 1)
+    cards = list(range(low_card, high_card + 1))
+    rng.shuffle(cards)
+    num_discarded = rng.randint(0, len(cards) - 1)
+    take_rate = rng.random()
+    num_decisions = rng.randint(0, 4 * len(cards) * (num_players + 1))
+    decisions = tuple(rng.random() < take_rate for _ in range(num_decisions))
+    return Case(num_players, rng.randint(0, max_coins), low_card, high_card,
+                tuple(cards[num_discarded:]), tuple(cards[:num_discarded]), decisions)
+
+
+def remove_card(case, card):
+    """Return the case without a card at the end of its range, or None."""
+    if card not in (case.low_card, case.high_card) or case.low_card == case.high_card:
+        return None
+    deck = tuple(c for c in case.deck if c != card)
+    if not deck:
+        return None
+    low_card = case.low_card + (card == case.low_card)
+    high_card = case.high_card - (card == case.high_card)
+    return case._replace(low_card=low_card, high_card=high_card, deck=deck,
+                         discarded=tuple(c for c in case.discarded if c != card))
+
+
+def simplifications(case):
+    """Yield smaller or simpler variants of a case."""
+    decisions = case.decisions
+    # Drop the end of the script, then single decisions, then takes
+    for length in (0, len(decisions) // 2, len(decisions) - 1):
+        if 0 <= length < len(decisions):
+            yield case._replace(decisions=decisions[:length])
+    for i in range(len(decisions)):
+        yield case._replace(decisions=decisions[:i] + decisions[i + 1:])
+    for i, decision in enumerate(decisions):
+        if decision:
+            yield case._replace(decisions=decisions[:i] + (False,) + decisions[i + 1:])
+    if case.num_players > 1:
+        yield case._replace(num_players=case.num_players - 1)
+    if case.starting_coins > 0:
+        yield case._replace(starting_coins=0)
+        yield case._replace(starting_coins=case.starting_coins - 1)
+    for card in (case.high_card, case.low_card):
+        smaller = remove_card(case, card)
+        if smaller is not None:
+            yield smaller
+    if case.discarded:
+        # Deal the last discarded card last instead
+        yield case._replace(deck=case.deck + case.discarded[-1:],
+                            discarded=case.discarded[:-1])
+
+
+def shrink(case, engine):
+    """Return a minimal case on which the engine still differs from the reference."""
+    simplified = True
+    while simplified:
+        simplified = False
+        for smaller in simplifications(case):
+            if compare(smaller, engine) is not None:
+                case, simplified = smaller, True
+                break
+    return case
+
+
+def fuzz_batch(args):
+    """Compare num_games random cases from seed; return the first failing case or None."""
+    engine, seed, num_games = args
+    rng = random.Random(seed)
+    for _ in range(num_games):
+        case = random_case(rng)
+        if compare(case, engine) is not None:
+            return case
+    return None
+
+
+def fuzz(engine, num_games=10000, seed=0, processes=None, batch_size=1000):
+    """Compare the engine to the reference on random cases.
+
+    Return None if they always agree, else a shrunk Case and how it differs.
+    The engine must be a module-level function so it can be sent to the worker
+    processes.
+    """
+    batches = [(engine, seed + i, min(batch_size, num_games - start))
+               for i, start in enumerate(range(0, num_games, batch_size))]
+    with Pool(processes) as pool:
+        for case in pool.imap(fuzz_batch, batches):
+            if case is not None:
+                pool.terminate()
+                case = shrink(case, engine)
+                return case, compare(case, engine)
+    return None
+
+
+def main():
+    """Check the step API against the reference."""
+    result = fuzz(step_engine, num_games=100000)
+    if result is None:
+        print('No differences found.')
+    else:
+        case, difference = result
+        print('Minimal case: {}\n{}'.format(case, difference))
+
+
+if __name__ == "__main__":
+    main()
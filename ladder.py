@@ -0,0 +1,137 @@
+"""Define a rating ladder for large pools of No Thanks strategies.
+
+Rather than seating strategies uniformly at random, the ladder keeps an
+Elo-style rating for every strategy, updates it after every game, and seats
+the tables whose results it is least sure of.
+"""
+
+from math import sqrt
+import random
+
+import nothanks
+
+
+class Ladder():
+    """Define a multiplayer Elo rating ladder with adaptive matchmaking.
+
+    Each game is scored as a set of head-to-head results between every pair of
+    players at the table (lower score wins, equal scores draw).
+    """
+
+    def __init__(self, strategies=(), initial_rating=1500, k_factor=32,
+                 rng=None, **game_options):
+        """Create ladder.
+
+        strategies: strategies as accepted by nothanks.make_player
+        k_factor: the largest rating change a single game can cause
+        rng: source of randomness for matchmaking and games
+        game_options: keyword arguments for nothanks.Game
+        """
+        self.initial_rating = initial_rating
+        self.k_factor = k_factor
+        self.rng = random if rng is None else rng
+        self.game_options = game_options
+        self.strategies = {}  # name -> strategy
+        self.ratings = {}
+        self.games = {}
+        for strategy in strategies:
+            self.add(strategy)
+
+    def add(self, strategy):
+        """Add a strategy to the ladder (if not already on it)."""
+        name = nothanks.strategy_name(strategy)
+        if name not in self.strategies:
+            self.strategies[name] = strategy
+            self.ratings[name] = self.initial_rating
+            self.games[name] = 0
+        return name
+
+    def uncertainty(self, name):
+        """Return how unsure we are of a rating (1 before any games, then shrinking)."""
+        return 1 / sqrt(1 + self.games[name])
+
+    def expected(self, name, other):
+        """Return the expected head-to-head result of name against other."""
+        return 1 / (1 + 10 ** ((self.ratings[other] - self.ratings[name]) / 400))
+
+    def update(self, names, scores):
+        """Update ratings from one game.
+
+        names: names of the strategies seated in the game
+        scores: the corresponding final scores
+        """
+        num_players = len(names)
+        if num_players < 2:
+            return
+        # Compute every change from the ratings before the game
+        changes = [0] * num_players
+        for i in range(num_players):
+            for j in range(num_players):
+                if i == j:
+                    continue
+                if scores[i] < scores[j]:
+                    actual = 1
+                elif scores[i] == scores[j]:
+                    actual = 0.5
+                else:
+                    actual = 0
+                changes[i] += actual - self.expected(names[i], names[j])
+        for name, change in zip(names, changes):
+            # Ratings of new strategies move quickly, then settle down
+            k = self.k_factor * max(0.25, self.uncertainty(name))
+            self.ratings[name] += k * change / (num_players - 1)
+            self.games[name] += 1
+
+    def matchmake(self, num_players):
+        """Return the names of the strategies to seat at the next table.
+
+        The least-played strategy is seated first, then the strategies whose
+        results against it are least predictable, favoring uncertain ratings.
+        """
+        names = list(self.strategies)
+        self.rng.shuffle(names)  # break ties at random
+        anchor = min(names, key=lambda name: self.games[name])
+        def informativeness(name):
+            p = self.expected(anchor, name)
+            return p * (1 - p) * (self.uncertainty(anchor) + self.uncertainty(name))
+        others = sorted((name for name in names if name != anchor),
+                        key=informativeness, reverse=True)
+        table = [anchor] + others[:num_players - 1]
+        # Small pools fill the remaining seats with repeats
+        while len(table) < num_players:
+            table.append(self.rng.choice(names))
+        return table
+
+    def play(self, num_players):
+        """Play a single matchmade game and update the ratings."""
+        names = self.matchmake(num_players)
+        players = [nothanks.make_player(self.strategies[name]) for name in names]
+        game = nothanks.Game(players, rng=self.rng, **self.game_options)
+        _, scores = game.run()
+        self.update(names, [scores[id(p)] for p in players])
+
+    def run(self, num_games, game_sizes=(3, 4, 5)):
+        """Play num_games games, cycling through the game sizes."""
+        for i in range(num_games):
+            self.play(game_sizes[i % len(game_sizes)])
+
+    def standings(self):
+        """Return (name, rating, games) tuples from best to worst rating."""
+        return sorted(((name, self.ratings[name], self.games[name])
+                       for name in self.strategies),
+                      key=lambda standing: standing[1], reverse=True)
+
+
+def main():
+    """Rate threshold variants against the bundled strategies and print the standings."""
+    strategies = ['nothanks', 'threshold', 'sequence_threshold']
+    strategies += [('threshold', {'threshold': t}) for t in range(0, 25, 2)]
+    strategies += [('sequence_threshold', {'threshold': t}) for t in range(0, 25, 2)]
+    ladder = Ladder(strategies)
+    ladder.run(3000)
+    for name, rating, games in ladder.standings():
+        print('{:40} {:7.1f} ({} games)'.format(name, rating, games))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,16 @@
 from collections import defaultdict
 from copy import deepcopy
 import logging
-import networkx as nx
-import pandas as pd
-from progress.bar import ChargingBar as ProgressBar
-from random import random, shuffle
+import random
 from sortedcontainers import SortedSet
 import sys
 from time import time
 
+import checkpoint
 import nothanks
+import telemetry
+
+# networkx and pandas are slow to import, so they are only imported when used.
 
 logger = logging.getLogger(__name__)
 
@@ -125,6 +126,7 @@ class game_tree():
         self.high_card = high_card
         self.discard = discard
 
+        import networkx as nx
         self.tree = nx.DiGraph()
         state = game_state(num_players=num_players,
                            starting_coins=starting_coins,
@@ -227,7 +229,54 @@ class game_tree():
             payoffs = self.tree.nodes[state_hash]['payoff']
         return payoffs
 
-    def train(self, num_games, print_progress=True):
+    def get_checkpoint(self, state_hashes):
+        """Return the strategy learned at these states for a checkpoint."""
+        nodes = {}
+        for state_hash in state_hashes:
+            node = self.tree.nodes[state_hash]
+            edges = {end: (edge['weight'], edge['avg_weight'])
+                     for end, edge in self.tree.succ[state_hash].items()}
+            nodes[state_hash] = (node['visits'], list(node['regret']), edges)
+        return nodes
+
+    def restore_checkpoint(self, nodes):
+        """Restore the strategy saved by get_checkpoint."""
+        for state_hash, (visits, regret, edges) in nodes.items():
+            node = self.tree.nodes[state_hash]
+            node['visits'] = visits
+            node['regret'] = list(regret)
+            for end, (weight, avg_weight) in edges.items():
+                edge = self.tree.edges[(state_hash, end)]
+                edge['weight'] = weight
+                edge['avg_weight'] = avg_weight
+
+    def train(self, num_games, print_progress=True,
+              checkpoint_path=None, checkpoint_every=1000, metrics_path=None):
+        """Train strategy by self-play.
+
+        print_progress: report progress and throughput on stderr
+        checkpoint_path: if given, journal the strategy learned every
+                         checkpoint_every games and resume from the journal if
+                         it exists; each entry only holds the states updated
+                         since the previous one, and resuming a journal
+                         written for a different game raises ValueError
+        metrics_path: if given, periodically write throughput metrics here
+        """
+        # Resume from the journal, replaying its entries in order
+        start = 0
+        updated = set()  # states updated since the last checkpoint
+        # The settings the journal must have been written with to be resumed
+        run = {'num_players': self.num_players, 'starting_coins': self.starting_coins,
+               'low_card': self.low_card, 'high_card': self.high_card,
+               'discard': self.discard}
+        if checkpoint_path is not None:
+            journal = checkpoint.Journal(checkpoint_path)
+            for record in journal.records:
+                checkpoint.check_run(checkpoint_path, record.get('run'), run)
+                self.restore_checkpoint(record['nodes'])
+                start = record['games']
+                random.setstate(record['random'])
+
         # Create a set of identical players, each referencing this game tree
         players = [Player(self, num_players=self.num_players,
                           starting_coins=self.starting_coins,
@@ -236,16 +285,21 @@ class game_tree():
                           discard=self.discard)
                    for _ in range(self.num_players)]
         # Simulate self-play
-        if print_progress:
-            iterable = ProgressBar('Training').iter(range(num_games))
-        else:
-            iterable = range(num_games)
-        for _ in iterable:
-            winners, _ = nothanks.Game(players,
-                                       starting_coins=self.starting_coins,
-                                       low_card=self.low_card,
-                                       high_card=self.high_card,
-                                       discard=self.discard).run()
+        throughput = telemetry.Throughput('train', total=num_games - start,
+                                          metrics_path=metrics_path,
+                                          stream=sys.stderr if print_progress else None)
+        for game_index in range(start, num_games):
+            if checkpoint_path is not None and game_index % checkpoint_every == 0:
+                journal.append({'run': run, 'games': game_index, 'random': random.getstate(),
+                                'nodes': self.get_checkpoint(updated)})
+                updated = set()
+            game = nothanks.Game(players,
+                                 starting_coins=self.starting_coins,
+                                 low_card=self.low_card,
+                                 high_card=self.high_card,
+                                 discard=self.discard)
+            winners, _ = game.run()
+            throughput.update(games=1, decisions=len(game.decisions), iterations=1)
             # Update the shared game tree based on game results.
             for player in players:
                 payoff = -1 / self.num_players
@@ -277,6 +331,7 @@ class game_tree():
                     if node['visits'] == 0:
                         logger.debug('LOG: State {} was visited for the first time this game.'.format(state_hash))
                     # Then update node and edge values
+                    updated.add(state_hash)
                     node['visits'] += 1 
                     # Add new regret for the action we DIDN'T take
                     node['regret'][not action] += regret
@@ -295,6 +350,11 @@ class game_tree():
                     pass_edge['avg_weight'] *= (node['visits'] - 1) / node['visits']
                     pass_edge['avg_weight'] += pass_edge['weight'] / node['visits']
 
+        throughput.close()
+        if checkpoint_path is not None:
+            journal.append({'run': run, 'games': num_games, 'random': random.getstate(),
+                            'nodes': self.get_checkpoint(updated)})
+
     def reduce(self):
         """Return a dictionary of player action states and corresponding strategies."""
         output = {}
@@ -336,7 +396,7 @@ class Player(nothanks.Player):
         take_state = deepcopy(self.state)
         take_state.take()
         prob_take = self.tree.get_edge_weight(self.state, take_state)
-        take = random() < prob_take
+        take = random.random() < prob_take
         self.history[self.state.prehash()] = take
         return take
 
@@ -382,6 +442,7 @@ def main():
     elapsed = time() - start
 
     # Pandas DataFrame print options
+    import pandas as pd
     pd.set_option('display.width', 9999)
     pd.set_option('display.max_rows', 9999)
     print(pd.DataFrame(tree.reduce()).transpose())
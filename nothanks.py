@@ -1,8 +1,11 @@
 """Define the No Thanks Game and Player."""
 
-from itertools import cycle
+from collections import namedtuple
+from collections.abc import Sequence
+from copy import copy
+from importlib import import_module
 import logging
-from random import shuffle
+import random
 from sortedcontainers import SortedSet
 
 logger = logging.getLogger(__name__)
@@ -10,6 +13,11 @@ logger = logging.getLogger(__name__)
 # logger.setLevel(level=logging.DEBUG)
 # logger.addHandler(logging.StreamHandler(sys.stdout))
 
+# Which action notifications a player wants passed to its update method
+NOTIFY_NONE = 0  # never call update
+NOTIFY_OWN = 1  # only for the player's own actions
+NOTIFY_ALL = 2  # for every player's actions
+
 class Player():  # pylint: disable=unused-argument
     """Define the base class for No Thanks players.
 
@@ -21,13 +29,19 @@ class Player():  # pylint: disable=unused-argument
     arguments as this is how it will be called during the competition. Use
     default arguments to define a flexible creator that can also accept no
     arguments.
+
+    Set the notifications class attribute to NOTIFY_NONE or NOTIFY_OWN if the
+    player ignores some or all of the update calls so the game can skip them.
     """
 
+    notifications = NOTIFY_ALL
+
     def update(self, player_id, card, pot, action):
         """Receive action notification from game.
 
-        After every player's turn, all players will be notified of the action
-        chosen (take card and pot or pay one and pass).
+        After every player's turn, players will be notified of the action
+        chosen (take card and pot or pay one and pass) according to their
+        notifications setting.
         player_id: a unique identifier for the player. Will be the same across
                    games for any player instance.
         card: card value
@@ -44,6 +58,15 @@ class Player():  # pylint: disable=unused-argument
         """
         return False
 
+    def set_view(self, view):
+        """Receive a read-only view of the game about to start.
+
+        The view reflects the game state as it is played so players that need
+        to know hands, coins, etc. can read them rather than tracking them.
+        view: a GameView of the new game
+        """
+        self.view = view
+
     def prepare_for_new_game(self, player_order):
         """Prepare for a new game.
 
@@ -54,6 +77,153 @@ class Player():  # pylint: disable=unused-argument
         pass
 
 
+def make_player(strategy):
+    """Create a player from a strategy.
+
+    strategy: the name of a module defining a Player class, or a pair of module
+              name and dictionary of keyword arguments for the Player creator
+    """
+    if isinstance(strategy, str):
+        return import_module(strategy).Player()
+    module, params = strategy
+    return import_module(module).Player(**params)
+
+
+def strategy_name(strategy):
+    """Return a readable, unique name for a strategy (see make_player)."""
+    if isinstance(strategy, str):
+        return strategy
+    module, params = strategy
+    return '{}({})'.format(module, ', '.join('{}={!r}'.format(k, v)
+                                             for k, v in sorted(params.items())))
+
+
+def get_notifications(player):
+    """Return which action notifications the player should receive.
+
+    Players that do not override the base update method never need it called.
+    """
+    if type(player).update is Player.update:
+        return NOTIFY_NONE
+    return player.notifications
+
+
+class CardsView(Sequence):
+    """Define a read-only, sorted view of a player's cards."""
+
+    def __init__(self, player_state):
+        self._player_state = player_state
+
+    def __getitem__(self, index):
+        return self._player_state['cards'][index]
+
+    def __len__(self):
+        return len(self._player_state['cards'])
+
+    def __contains__(self, card):
+        return card in self._player_state['cards']
+
+    def __iter__(self):
+        return iter(self._player_state['cards'])
+
+    def __repr__(self):
+        return 'CardsView({})'.format(list(self))
+
+
+class GameView():
+    """Define a read-only view of a game's state for its players.
+
+    The view reads directly from the game so it is always up to date and
+    nothing is copied.
+    """
+
+    def __init__(self, game):
+        self._game = game
+
+    @property
+    def player_order(self):
+        """Return the player ids in order of play."""
+        return [id(p) for p in self._game.players]
+
+    @property
+    def current_player(self):
+        """Return the id of the player whose turn it is (None once the game is over)."""
+        player = self._game.current_player
+        return None if player is None else id(player)
+
+    @property
+    def low_card(self):
+        """Return the lowest card value in the deck."""
+        return self._game.low_card
+
+    @property
+    def high_card(self):
+        """Return the highest card value in the deck."""
+        return self._game.high_card
+
+    @property
+    def card(self):
+        """Return the card in play."""
+        return self._game.card
+
+    @property
+    def pot(self):
+        """Return the number of coins in the pot."""
+        return self._game.pot
+
+    @property
+    def deck_size(self):
+        """Return the number of cards left in the deck."""
+        return len(self._game.deck)
+
+    def cards(self, player_id):
+        """Return the cards the player holds."""
+        return CardsView(self._game.state[player_id])
+
+    def coins(self, player_id):
+        """Return the number of coins the player holds."""
+        return self._game.state[player_id]['coins']
+
+    def scores(self):
+        """Return every player's current score."""
+        return self._game.get_scores()
+
+    def simulate(self, rng=None):
+        """Return a detached copy of the game with the unseen cards reshuffled.
+
+        Use the copy's step method to try out actions (e.g. in rollouts); the
+        players are never consulted or notified by the copy.
+        """
+        game = self._game.copy()
+        game.sample_deck(rng)
+        return game
+
+
+class PlayerCycler():
+    """Define an iterator that cycles through the players in order.
+
+    Unlike itertools.cycle, its position can be saved and restored.
+    """
+
+    def __init__(self, players, index=-1):
+        self.players = players
+        self.index = index
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.index = (self.index + 1) % len(self.players)
+        return self.players[self.index]
+
+
+# A compact copy of the game state. The deck is dealt from its end, hands and
+# coins are in order of play, index is the position of the current player
+# in that order, and decisions are those made so far.
+GameSnapshot = namedtuple('GameSnapshot', ['deck', 'discarded', 'hands', 'coins',
+                                           'card', 'pot', 'index', 'decisions'])
+
+
 class Game():
     """Define No Thanks Game.
 
@@ -62,7 +232,11 @@ class Game():
     """
 
     def __init__(self, players, starting_coins=11,
-                 low_card=3, high_card=35, discard=9):
+                 low_card=3, high_card=35, discard=9, rng=None):
+        # The range of card values in the deck
+        self.low_card = low_card
+        self.high_card = high_card
+
         # Too keep track of player states for rule enforcement and scoring
         self.card = None
         self.pot = 0
@@ -71,30 +245,49 @@ class Game():
             self.state[id(player)] = {'cards': SortedSet(),
                                       'coins': starting_coins}
 
+        # Source of randomness for shuffling (the random module by default)
+        self.rng = random if rng is None else rng
+
         # A list of Player objects
         self.players = players.copy()  # keep a local copy of the player list
-        shuffle(self.players)  # randomize play order
-        self.player_cycler = cycle(self.players)
+        self.rng.shuffle(self.players)  # randomize play order
+        self.player_cycler = PlayerCycler(self.players)
         self.current_player = None
 
+        # Only notify players of the actions they subscribed to
+        self.notify_all = [p for p in self.players
+                           if get_notifications(p) == NOTIFY_ALL]
+        self.notify_own = {id(p) for p in self.players
+                           if get_notifications(p) == NOTIFY_OWN}
+
         # The deck of cards (create, shuffle, then discard)
+        # Cards are dealt from the end of the list, which takes constant time.
         self.deck = list(range(low_card, high_card + 1))
-        shuffle(self.deck)
+        self.rng.shuffle(self.deck)
+        self.discarded = self.deck[:discard]
         del self.deck[:discard]
 
+        # A record of the game: the order cards were dealt and every decision
+        self.deck_order = ()
+        self.decisions = []
+
+        # A read-only view of this game to share with the players
+        self.view = GameView(self)
+
     def deal_card(self):
-        """Remove first card from deck and return it."""
-        return self.deck.pop(0)
+        """Remove top card from deck and return it."""
+        return self.deck.pop()
 
     def player_action(self, player, card, pot):
         """Run a single turn of No Thanks."""
         player_state = self.state[id(player)]
-        logger.debug(('TURN: Player {} is offered card {} and {} coin{} ' +
-                      'and has {} and {} coin{}.'
-                     ).format(player, card, pot, 's'[pot==1:],
-                              list(player_state['cards']),
-                              player_state['coins'],
-                              's'[player_state['coins']==1:]))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(('TURN: Player {} is offered card {} and {} coin{} ' +
+                          'and has {} and {} coin{}.'
+                         ).format(player, card, pot, 's'[pot==1:],
+                                  list(player_state['cards']),
+                                  player_state['coins'],
+                                  's'[player_state['coins']==1:]))
         # If current player is out of tokens, they must take it;
         # otherwise, ask if current player wants it
         try:
@@ -106,14 +299,20 @@ class Game():
         return took_card
 
     def notify_players(self, player, card, pot, took_card):
-        """Notify all players of action chosen."""
+        """Notify subscribed players of action chosen."""
         player_id = id(player)
-        for p in self.players:
-            try:
-                p.update(player_id, card, pot, took_card)
-            except Exception as e:
-                logger.info(('Player {} raised an exception during the ' +
-                            '"update" step.').format(player))
+        if player_id in self.notify_own:
+            self.notify_player(player, player_id, card, pot, took_card)
+        for p in self.notify_all:
+            self.notify_player(p, player_id, card, pot, took_card)
+
+    def notify_player(self, p, player_id, card, pot, took_card):
+        """Notify a single player of action chosen."""
+        try:
+            p.update(player_id, card, pot, took_card)
+        except Exception as e:
+            logger.info(('Player {} raised an exception during the ' +
+                        '"update" step.').format(p))
 
     def update_game(self, player, card, pot, took_card):
         """Update game state and return current player, card, and pot."""
@@ -123,16 +322,17 @@ class Game():
             assert card not in player_state['cards'], 'Player {} already has {}! ({})'.format(player, card, list(player_state['cards']))
             player_state['cards'].add(card)
             player_state['coins'] += pot
-            logger.debug(('TAKE: Player {} took them and now ' +
-                            'has {} and {} coin{}.'
-                            ).format(player, list(player_state['cards']),
-                                    player_state['coins'],
-                                    's'[player_state['coins']==1:]))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(('TAKE: Player {} took them and now ' +
+                              'has {} and {} coin{}.'
+                              ).format(player, list(player_state['cards']),
+                                       player_state['coins'],
+                                       's'[player_state['coins']==1:]))
             if self.deck:  # there are cards left in the deck
                 next_card = self.deal_card()
                 new_pot = 0
                 next_player = player  # same player goes again
-                logger.debug('DEAL: The next card is {}. (Pot reset to {}.)'.format(next_card, new_pot))
+                logger.debug('DEAL: The next card is %s. (Pot reset to %s.)', next_card, new_pot)
             else:  # no cards left; game over
                 next_player = next_card = new_pot = None
                 logger.debug('END: Game over!')
@@ -143,11 +343,12 @@ class Game():
             next_card = card
             new_pot = pot + 1
             next_player = next(self.player_cycler)
-            logger.debug(('PASS: Player {} said "No Thanks!" and now ' +
-                            'has {} coin{}. The pot now has {} coin{}.'
-                            ).format(player, player_state['coins'],
-                                    's'[player_state['coins']==1:],
-                                    new_pot, 's'[new_pot==1:]))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(('PASS: Player {} said "No Thanks!" and now ' +
+                              'has {} coin{}. The pot now has {} coin{}.'
+                              ).format(player, player_state['coins'],
+                                       's'[player_state['coins']==1:],
+                                       new_pot, 's'[new_pot==1:]))
         return next_player, next_card, new_pot
 
     def setup_game(self):
@@ -156,11 +357,18 @@ class Game():
         logger.debug('START: Starting new game with players {}.'.format(self.players))
         player_order = [id(p) for p in self.players]
         for player in self.players:
+            try:
+                player.set_view(self.view)
+            except Exception as e:
+                logger.info(('Player {} raised an exception during the ' +
+                             '"set_view" step.').format(player))
             try:
                 player.prepare_for_new_game(player_order)
             except Exception as e:
                 logger.info(('Player {} raised an exception during the ' +
                              '"prepare_for_new_game" step.').format(player))
+        self.deck_order = tuple(reversed(self.deck))
+        self.decisions = []
         self.current_player = next(self.player_cycler)
         self.card = self.deal_card()
         self.pot = 0
@@ -170,6 +378,7 @@ class Game():
         # Play until out of cards (when update_game returns None, None, None)
         while self.current_player:
             took_card = self.player_action(self.current_player, self.card, self.pot)
+            self.decisions.append(took_card)
             self.notify_players(self.current_player, self.card, self.pot, took_card)
             next_player, next_card, new_pot = self.update_game(self.current_player,
                                                                self.card, self.pot, took_card)
@@ -177,6 +386,68 @@ class Game():
             self.card = next_card
             self.pot = new_pot
 
+    def step(self, took_card):
+        """Apply the current player's action and return whether play continues.
+
+        Unlike play, step does not ask or notify the players; it is meant for
+        players searching the game tree from a copy of the game. A player with
+        no coins takes the card regardless of took_card.
+        """
+        player = self.current_player
+        took_card = took_card or self.state[id(player)]['coins'] == 0
+        self.decisions.append(took_card)
+        next_player, next_card, new_pot = self.update_game(player, self.card,
+                                                           self.pot, took_card)
+        self.current_player = next_player
+        self.card = next_card
+        self.pot = new_pot
+        return next_player is not None
+
+    def snapshot(self):
+        """Return a GameSnapshot of the current game state."""
+        states = [self.state[id(p)] for p in self.players]
+        return GameSnapshot(tuple(self.deck), tuple(self.discarded),
+                            tuple(tuple(s['cards']) for s in states),
+                            tuple(s['coins'] for s in states),
+                            self.card, self.pot, self.player_cycler.index,
+                            tuple(self.decisions))
+
+    def restore(self, snapshot):
+        """Return the game to the state saved in snapshot."""
+        self.deck = list(snapshot.deck)
+        self.discarded = list(snapshot.discarded)
+        for player, hand, coins in zip(self.players, snapshot.hands, snapshot.coins):
+            # Update in place so existing views of the state stay valid
+            player_state = self.state[id(player)]
+            player_state['cards'] = SortedSet(hand)
+            player_state['coins'] = coins
+        self.card = snapshot.card
+        self.pot = snapshot.pot
+        self.player_cycler.index = snapshot.index
+        self.decisions = list(snapshot.decisions)
+        if snapshot.card is None:
+            self.current_player = None
+        else:
+            self.current_player = self.players[snapshot.index]
+
+    def copy(self):
+        """Return an independent copy of the game with the same players."""
+        game = copy(self)
+        game.state = {id(p): {} for p in self.players}
+        game.player_cycler = PlayerCycler(game.players)
+        game.view = GameView(game)
+        game.decisions = list(self.decisions)
+        game.restore(self.snapshot())
+        return game
+
+    def sample_deck(self, rng=None):
+        """Reshuffle the cards not yet seen between the deck and the discards."""
+        rng = self.rng if rng is None else rng
+        unseen = self.deck + self.discarded
+        rng.shuffle(unseen)
+        self.deck = unseen[:len(self.deck)]
+        self.discarded = unseen[len(self.deck):]
+
     def get_results(self):
         """Score the game."""
         # Tally final scores
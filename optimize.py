@@ -0,0 +1,112 @@
+"""Tune strategy parameters with batched games and successive halving.
+
+Every round, each remaining candidate plays a batch of games against the
+opponent field, then the worse half of the candidates are dropped and the
+survivors' batches double. This spends most games on the promising candidates.
+"""
+
+from collections import namedtuple
+from math import ceil, sqrt
+import random
+
+import nothanks
+
+# A candidate's parameters with its mean payoff, 95% confidence interval, and
+# number of games played. A payoff is the player's share of the win minus an
+# even share, so zero is average and positive is better than average.
+Result = namedtuple('Result', ['params', 'mean', 'low', 'high', 'games'])
+
+
+def evaluate(strategy, opponents, num_players, num_games, seed, game_options):
+    """Play a batch of games and return the strategy's payoffs.
+
+    The strategy takes one seat and the others are drawn from opponents.
+    """
+    rng = random.Random(seed)
+    payoffs = []
+    for _ in range(num_games):
+        player = nothanks.make_player(strategy)
+        players = [player] + [nothanks.make_player(s) for s in
+                              rng.choices(opponents, k=num_players - 1)]
+        winners, _ = nothanks.Game(players, rng=rng, **game_options).run()
+        payoff = -1 / num_players
+        if id(player) in winners:
+            payoff += 1 / len(winners)
+        payoffs.append(payoff)
+    return payoffs
+
+
+def evaluate_batch(args):
+    """Call evaluate with a tuple of arguments (for use with Pool.map)."""
+    return evaluate(*args)
+
+
+def summarize(params, payoffs):
+    """Return the Result for a candidate's payoffs."""
+    games = len(payoffs)
+    mean = sum(payoffs) / games
+    if games > 1:
+        variance = sum((p - mean) ** 2 for p in payoffs) / (games - 1)
+    else:
+        variance = float('inf')
+    margin = 1.96 * sqrt(variance / games)
+    return Result(params, mean, mean - margin, mean + margin, games)
+
+
+def optimize(module, candidates, opponents=None, num_players=4,
+             batch_size=50, keep=0.5, rng=None, map_batches=map,
+             **game_options):
+    """Search candidate parameters for a strategy and return Results, best first.
+
+    module: name of the strategy module to tune
+    candidates: a list of parameter dictionaries for the module's Player
+    opponents: strategies (see nothanks.make_player) to play against; by default
+               the remaining candidates play each other
+    batch_size: games per candidate in the first round (doubles every round)
+    keep: fraction of candidates kept after each round (at least one is
+          dropped every round)
+    map_batches: used to run the round's batches, e.g. multiprocessing.Pool().map
+    game_options: keyword arguments for nothanks.Game
+    """
+    if not candidates:
+        raise ValueError('No candidates to optimize')
+    if not 0 < keep < 1:
+        raise ValueError('keep must be between 0 and 1, not {}'.format(keep))
+    rng = random if rng is None else rng
+    payoffs = {i: [] for i in range(len(candidates))}
+    remaining = list(payoffs)
+    num_games = batch_size
+    while True:
+        if opponents is None:
+            field = [(module, candidates[i]) for i in remaining]
+        else:
+            field = opponents
+        batches = [((module, candidates[i]), field, num_players, num_games,
+                    rng.randrange(2 ** 32), game_options) for i in remaining]
+        for i, batch in zip(remaining, map_batches(evaluate_batch, batches)):
+            payoffs[i].extend(batch)
+        remaining.sort(key=lambda i: sum(payoffs[i]) / len(payoffs[i]), reverse=True)
+        # Drop at least one candidate, but always keep the best
+        remaining = remaining[:max(1, min(len(remaining) - 1, ceil(len(remaining) * keep)))]
+        if len(remaining) <= 1:
+            break
+        num_games *= 2
+
+    results = [summarize(candidates[i], payoffs[i]) for i in payoffs]
+    # Survivors of the most rounds first, then by mean payoff
+    return sorted(results, key=lambda r: (r.games, r.mean), reverse=True)
+
+
+def main():
+    """Tune the sequence threshold player against the bundled strategies."""
+    candidates = [{'threshold': t} for t in range(0, 25)]
+    opponents = ['threshold', 'sequence_threshold']
+    results = optimize('sequence_threshold', candidates, opponents)
+    for result in results[:5]:
+        print('{}: {:+.3f} ({:+.3f} to {:+.3f}) over {} games'.format(
+            nothanks.strategy_name(('sequence_threshold', result.params)),
+            result.mean, result.low, result.high, result.games))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Stream per-game records to compact fixed-width binary files.
+
+Each game is stored as one fixed-width record holding the seating (strategy
+codes in order of play), the order cards were dealt, every take (1) or pass (0)
+decision packed into bits, and the final scores. Records are appended to the
+log in chunks, so memory use stays bounded no matter how many games are played.
+A JSON file next to the log (log path + '.json') describes the record layout and
+lists the strategy names the codes refer to.
+
+Because every record has the same width, the whole log can be loaded as a NumPy
+structured array (or memory-mapped) without parsing records one at a time.
+"""
+
+import json
+import os
+import struct
+
+FORMAT_VERSION = 2
+
+
+def get_max_decisions(max_players, max_cards, starting_coins):
+    """Return the most decisions a game can take.
+
+    Every pass puts a player's coin in the pot, so there can be no more passes
+    per card than coins on the table.
+    """
+    return max_cards * (max_players * starting_coins + 1)
+
+
+class RecordLayout():
+    """Define the fixed-width layout of a game record."""
+
+    def __init__(self, max_players=5, max_cards=24, starting_coins=11,
+                 max_decisions=None):
+        self.max_players = max_players
+        self.max_cards = max_cards
+        if max_decisions is None:
+            max_decisions = get_max_decisions(max_players, max_cards, starting_coins)
+        self.max_decisions = max_decisions
+        self.decision_bytes = (max_decisions + 7) // 8
+        # num_players, num_cards, num_decisions, strategies, scores, deck, decisions
+        self.struct = struct.Struct('<BHI{0}H{0}i{1}H{2}s'.format(
+            max_players, max_cards, self.decision_bytes))
+
+    @property
+    def size(self):
+        """Return the number of bytes in a record."""
+        return self.struct.size
+
+    def to_dict(self):
+        """Return the layout's parameters."""
+        return {'max_players': self.max_players, 'max_cards': self.max_cards,
+                'max_decisions': self.max_decisions}
+
+    def dtype(self):
+        """Return the equivalent NumPy structured dtype."""
+        import numpy as np
+        return np.dtype([('num_players', 'u1'),
+                          ('num_cards', '<u2'),
+                          ('num_decisions', '<u4'),
+                          ('strategies', '<u2', (self.max_players,)),
+                          ('scores', '<i4', (self.max_players,)),
+                          ('deck', '<u2', (self.max_cards,)),
+                          ('decisions', 'u1', (self.decision_bytes,))])
+
+    def pack(self, strategies, scores, deck, decisions):
+        """Return the bytes of a record."""
+        assert len(strategies) <= self.max_players, 'Too many players to record!'
+        assert len(deck) <= self.max_cards, 'Too many cards to record!'
+        assert len(decisions) <= self.max_decisions, 'Too many decisions to record!'
+        padding = [0] * (self.max_players - len(strategies))
+        return self.struct.pack(len(strategies), len(deck), len(decisions),
+                                *strategies, *padding, *scores, *padding,
+                                *deck, *[0] * (self.max_cards - len(deck)),
+                                pack_bits(decisions))
+
+    def unpack(self, record):
+        """Return the (strategies, scores, deck, decisions) of a record."""
+        fields = self.struct.unpack(record)
+        num_players, num_cards, num_decisions = fields[:3]
+        strategies = fields[3:3 + num_players]
+        scores_start = 3 + self.max_players
+        scores = fields[scores_start:scores_start + num_players]
+        deck_start = scores_start + self.max_players
+        deck = fields[deck_start:deck_start + num_cards]
+        decisions = unpack_bits(fields[-1], num_decisions)
+        return strategies, scores, deck, decisions
+
+
+def pack_bits(bits):
+    """Pack booleans into bytes, first bit in the most significant position."""
+    packed = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            packed[i >> 3] |= 0x80 >> (i & 7)
+    return bytes(packed)
+
+
+def unpack_bits(packed, count):
+    """Return the first count booleans packed by pack_bits."""
+    return [bool(packed[i >> 3] & (0x80 >> (i & 7))) for i in range(count)]
+
+
+def write_json(path, content):
+    """Write JSON to path atomically."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(content, f)
+    os.replace(temp_path, path)
+
+
+def read_metadata(path):
+    """Return the metadata and RecordLayout of a game record log."""
+    with open(path + '.json') as f:
+        metadata = json.load(f)
+    assert metadata['format'] == FORMAT_VERSION, 'Unknown record format {}!'.format(metadata['format'])
+    return metadata, RecordLayout(**metadata['layout'])
+
+
+class RecordWriter():
+    """Define a writer that appends game records to a log in chunks.
+
+    Use as a context manager, or call close when done, so the last chunk is
+    written. Appending to an existing log requires the same layout.
+    """
+
+    def __init__(self, path, layout=None, chunk_size=4096):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.buffered = 0
+        if os.path.exists(path + '.json'):
+            metadata, self.layout = read_metadata(path)
+            assert layout is None or layout.to_dict() == self.layout.to_dict(), \
+                'Cannot append records with a different layout!'
+            self.strategies = metadata['strategies']
+            self.count = metadata['count']
+            # Drop any records written after the metadata was last updated
+            with open(path, 'ab') as f:
+                f.truncate(self.count * self.layout.size)
+        else:
+            self.layout = RecordLayout() if layout is None else layout
+            self.strategies = []
+            self.count = 0
+        self.codes = {name: code for code, name in enumerate(self.strategies)}
+
+    def code(self, name):
+        """Return the code for a strategy name, adding it if new."""
+        if name not in self.codes:
+            self.codes[name] = len(self.strategies)
+            self.strategies.append(name)
+        return self.codes[name]
+
+    def write(self, game, names):
+        """Record a finished game.
+
+        game: the nothanks.Game, after it was run
+        names: a dictionary of player id to strategy name
+        """
+        scores = game.get_scores()
+        player_ids = [id(p) for p in game.players]
+        self.buffer += self.layout.pack([self.code(names[pid]) for pid in player_ids],
+                                        [scores[pid] for pid in player_ids],
+                                        game.deck_order, game.decisions)
+        self.buffered += 1
+        if self.buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Append buffered records to the log and update its metadata."""
+        with open(self.path, 'ab') as f:
+            f.write(self.buffer)
+        self.count += self.buffered
+        self.buffer = bytearray()
+        self.buffered = 0
+        write_json(self.path + '.json', {'format': FORMAT_VERSION,
+                                         'layout': self.layout.to_dict(),
+                                         'strategies': self.strategies,
+                                         'count': self.count})
+
+    def truncate(self, count):
+        """Discard all but the first count records (e.g. to resume a run)."""
+        assert count <= self.count, 'Cannot truncate to {} records; only {} written!'.format(count, self.count)
+        self.buffer = bytearray()
+        self.buffered = 0
+        with open(self.path, 'ab') as f:
+            f.truncate(count * self.layout.size)
+        self.count = count
+        self.flush()
+
+    def close(self):
+        """Write any remaining records."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def iter_records(path):
+    """Yield (strategies, scores, deck, decisions) for every game in a log.
+
+    Strategies are returned as names. This reads records one at a time in
+    Python; use read_array or read_frame for large logs.
+    """
+    metadata, layout = read_metadata(path)
+    strategies = metadata['strategies']
+    with open(path, 'rb') as f:
+        for _ in range(metadata['count']):
+            codes, scores, deck, decisions = layout.unpack(f.read(layout.size))
+            yield [strategies[c] for c in codes], scores, deck, decisions
+
+
+def read_array(path, mmap=False):
+    """Return the log as a NumPy structured array and the strategy names.
+
+    Strategy codes index into the names. Use numpy.unpackbits to expand the
+    decisions. Set mmap to memory-map the file rather than read it.
+    """
+    import numpy as np
+    metadata, layout = read_metadata(path)
+    if mmap:
+        records = np.memmap(path, dtype=layout.dtype(), mode='r',
+                            shape=(metadata['count'],))
+    else:
+        records = np.fromfile(path, dtype=layout.dtype(), count=metadata['count'])
+    return records, metadata['strategies']
+
+
+def read_frame(path):
+    """Return a pandas DataFrame with a row per game and a column per seat.
+
+    Seats beyond a game's number of players have no strategy and score.
+    """
+    import numpy as np
+    import pandas as pd
+    records, strategies = read_array(path)
+    frame = pd.DataFrame({'num_players': records['num_players'],
+                          'num_cards': records['num_cards'],
+                          'num_decisions': records['num_decisions']})
+    seated = np.arange(records['strategies'].shape[1]) < records['num_players'][:, None]
+    # Codes are unsigned, so make them signed to mark empty seats with -1
+    codes = records['strategies'].astype(np.int32)
+    for seat in range(seated.shape[1]):
+        names = pd.Categorical.from_codes(
+            np.where(seated[:, seat], codes[:, seat], -1),
+            categories=strategies)
+        frame['strategy_{}'.format(seat)] = names
+        frame['score_{}'.format(seat)] = pd.Series(records['scores'][:, seat]).where(seated[:, seat])
+    return frame
@@ -0,0 +1,110 @@
+"""Cache the results of competition tables across runs.
+
+Results are stored in a SQLite database keyed by everything that determines
+them: the identity of every strategy at the table (module, parameters and a
+hash of the source code of the module and the local modules it imports), the
+game engine's source, the game size and options, the number of games and the
+seed. Changing a strategy's code, the code it builds on, or its parameters
+changes its identity, so only tables involving it are replayed.
+"""
+
+import ast
+from functools import lru_cache
+import hashlib
+from importlib import import_module
+from importlib.util import find_spec
+import json
+import os
+import sqlite3
+
+
+@lru_cache(maxsize=None)
+def get_code_hash(module_name):
+    """Return a hash of a module's source code."""
+    with open(import_module(module_name).__file__, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def get_imports(path):
+    """Return the top-level names of the modules imported anywhere in a source file."""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names.add(node.module.split('.')[0])
+    return names
+
+
+@lru_cache(maxsize=None)
+def get_dependencies(module_name):
+    """Return the sorted names of a module and the local modules it imports.
+
+    Local modules are those in the module's directory. Imports are followed
+    recursively, including those inside functions, but modules imported by
+    name at run time (e.g. with importlib) are not found.
+    """
+    directory = os.path.dirname(import_module(module_name).__file__)
+    found = {module_name}
+    to_visit = [module_name]
+    while to_visit:
+        for name in get_imports(import_module(to_visit.pop()).__file__):
+            if name in found:
+                continue
+            try:
+                spec = find_spec(name)
+            except (ImportError, ValueError):
+                continue
+            if spec is not None and spec.origin and os.path.dirname(spec.origin) == directory:
+                found.add(name)
+                to_visit.append(name)
+    return tuple(sorted(found))
+
+
+def strategy_key(strategy):
+    """Return the identity of a strategy (see nothanks.make_player)."""
+    if isinstance(strategy, str):
+        module, params = strategy, {}
+    else:
+        module, params = strategy
+    code_hashes = [get_code_hash(name) for name in get_dependencies(module)]
+    return json.dumps([module, sorted(params.items()), code_hashes])
+
+
+def table_key(strategy_keys, num_games, seed, game_options):
+    """Return the cache key for a table of strategies."""
+    key = json.dumps([sorted(strategy_keys), get_code_hash('nothanks'), num_games,
+                      seed, sorted(game_options.items())])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ResultsCache():
+    """Define a persistent store of table results."""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results '
+                                '(key TEXT PRIMARY KEY, result TEXT)')
+
+    def get(self, key):
+        """Return the cached result for key, or None."""
+        row = self.connection.execute('SELECT result FROM results WHERE key = ?',
+                                      (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key, result):
+        """Store a result, committing it immediately."""
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?)',
+                                    (key, json.dumps(result)))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
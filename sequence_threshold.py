@@ -14,26 +14,24 @@ class Player(nothanks.Player):
 
     def play(self, card, pot):
         """Take card if resulting change in score is below the threshold."""
-        logger.debug('PLAY: Player {} thinks he has {} and is being offered {} and {} coin{}.'.format(self, list(self.cards), card, pot, "s"[pot==1:]))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('PLAY: Player {} thinks he has {} and is being offered {} and {} coin{}.'.format(self, list(self.cards), card, pot, "s"[pot==1:]))
         return self.get_net_score(card) - pot <= self.threshold
 
-    def update(self, player_id, card, _, action):
-        """If this player took a card, record it."""
-        if player_id == id(self) and action:
-            self.cards.add(card)
-            logger.debug('UPDATE: Player {} records taking {} and now has {}.'.format(self, card, list(self.cards)))
-
-    def prepare_for_new_game(self, _):
-        """Reset card property."""
-        self.cards = SortedSet()
+    def set_view(self, view):
+        """Read this player's cards from the game rather than tracking them."""
+        super().set_view(view)
+        self.cards = view.cards(id(self))
 
     def get_net_score(self, card):
         """Calculate the change in score from cards from taking this card."""
         assert card not in self.cards, ("Cannot add card {} because this player already has it! " +
                                         "({} has {})").format(card, self, list(self.cards))
-        if_take = SortedSet(self.cards)
-        if_take.add(card)
-        return get_score(if_take) - get_score(self.cards)
+        # Only the neighboring cards affect the change in score
+        net_score = 0 if card - 1 in self.cards else card
+        if card + 1 in self.cards:
+            net_score -= card + 1
+        return net_score
 
     def __str__(self):
         return '<Sequence-Threshold {} player>'.format(self.threshold)
@@ -0,0 +1,182 @@
+"""Profile competitions and training, and report their throughput.
+
+Profiler attributes CPU time and memory allocations to the strategy modules and
+to the phases of the game engine. Throughput reports progress while a run is
+going and periodically writes games, decisions and training iterations per
+second to a metrics file in the Prometheus text format.
+"""
+
+from collections import defaultdict
+import cProfile
+import os
+import pstats
+import sys
+from time import perf_counter
+import tracemalloc
+
+import nothanks
+
+# Engine phases and the Game methods whose cumulative time they are measured by
+ENGINE_PHASES = {'deal': ['setup_game', 'update_game'],
+                 'play': ['player_action'],
+                 'notify': ['notify_players'],
+                 'score': ['get_results']}
+
+
+class Profiler():
+    """Define a profiler that attributes CPU time and memory to strategies.
+
+    Use as a context manager around the code to profile, then call report.
+    CPU time is the time spent in each module's own functions. Memory is the
+    size of the allocations each module made that were still alive at the end,
+    and the peak memory of the whole run.
+    """
+
+    def __init__(self, strategies):
+        """Create profiler.
+
+        strategies: the strategies to attribute time to (see nothanks.make_player)
+        """
+        self.modules = sorted({s if isinstance(s, str) else s[0] for s in strategies})
+        self.profile = cProfile.Profile()
+        self.memory = {}
+        self.peak_memory = 0
+
+    def __enter__(self):
+        tracemalloc.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *_):
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, self.peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        files = self.module_files()
+        self.memory = defaultdict(int)
+        for stat in snapshot.statistics('filename'):
+            filename = stat.traceback[0].filename
+            self.memory[files.get(filename, 'other')] += stat.size
+
+    def module_files(self):
+        """Return a dictionary of source file to module name for the strategies."""
+        files = {}
+        for name in self.modules + ['nothanks']:
+            module = sys.modules.get(name)
+            if module is not None and getattr(module, '__file__', None):
+                files[module.__file__] = name
+        return files
+
+    def cpu_times(self):
+        """Return the CPU seconds spent in each strategy module and engine phase."""
+        files = self.module_files()
+        modules = defaultdict(float)
+        phases = defaultdict(float)
+        engine_file = nothanks.__file__
+        for (filename, _, function), stat in pstats.Stats(self.profile).stats.items():
+            _, _, own_time, cumulative_time, _ = stat
+            modules[files.get(filename, 'other')] += own_time
+            if filename == engine_file:
+                for phase, functions in ENGINE_PHASES.items():
+                    if function in functions:
+                        phases[phase] += cumulative_time
+        return modules, phases
+
+    def report(self, stream=sys.stdout):
+        """Print the CPU time and memory of each module and engine phase."""
+        modules, phases = self.cpu_times()
+        total = sum(modules.values()) or 1
+        print('{:30} {:>10} {:>7} {:>12}'.format('module', 'CPU (s)', 'CPU', 'memory (kB)'),
+              file=stream)
+        for name in sorted(set(modules) | set(self.memory)):
+            print('{:30} {:10.3f} {:6.1%} {:12.1f}'.format(
+                name, modules[name], modules[name] / total,
+                self.memory.get(name, 0) / 1024), file=stream)
+        print('peak memory: {:.1f} kB'.format(self.peak_memory / 1024), file=stream)
+        print('{:30} {:>10} {:>7}'.format('engine phase', 'CPU (s)', 'CPU'), file=stream)
+        for phase in ENGINE_PHASES:
+            print('{:30} {:10.3f} {:6.1%}'.format(phase, phases[phase],
+                                                  phases[phase] / total), file=stream)
+
+
+class Throughput():
+    """Define a progress and throughput reporter.
+
+    Call update as work is done. Every interval seconds (and at close) the
+    progress is printed to stream, if given, and the metrics are written to
+    metrics_path, if given.
+    """
+
+    # Metric names and help text
+    METRICS = [('games', 'Games played.'),
+               ('decisions', 'Take or pass decisions made.'),
+               ('iterations', 'Training iterations run.')]
+
+    def __init__(self, label, total=None, metrics_path=None, stream=None,
+                 interval=5, worker=None):
+        """Create reporter.
+
+        label: describes the work in progress reports
+        total: the number of games (or iterations) expected, if known
+        worker: labels the metrics; the process id by default, so use a
+                metrics_path per worker when running several
+        """
+        self.label = label
+        self.total = total
+        self.metrics_path = metrics_path
+        self.stream = stream
+        self.interval = interval
+        self.worker = os.getpid() if worker is None else worker
+        self.counts = {'games': 0, 'decisions': 0, 'iterations': 0}
+        self.start = self.last_report = perf_counter()
+
+    def update(self, games=0, decisions=0, iterations=0):
+        """Count work done, reporting if the interval has passed."""
+        self.counts['games'] += games
+        self.counts['decisions'] += decisions
+        self.counts['iterations'] += iterations
+        now = perf_counter()
+        if now - self.last_report >= self.interval:
+            self.report(now)
+
+    def rates(self, now=None):
+        """Return the counts per second since the start."""
+        now = perf_counter() if now is None else now
+        elapsed = max(now - self.start, 1e-9)
+        return {name: count / elapsed for name, count in self.counts.items()}
+
+    def report(self, now=None):
+        """Print progress and write metrics now."""
+        now = perf_counter() if now is None else now
+        self.last_report = now
+        rates = self.rates(now)
+        if self.stream is not None:
+            done = max(self.counts['games'], self.counts['iterations'])
+            progress = '{}'.format(done) if self.total is None else '{}/{}'.format(done, self.total)
+            print('\r{}: {} ({:.0f} games/s, {:.0f} decisions/s, {:.0f} iterations/s)'.format(
+                self.label, progress, rates['games'], rates['decisions'],
+                rates['iterations']), end='', file=self.stream, flush=True)
+        if self.metrics_path is not None:
+            self.write_metrics(rates)
+
+    def write_metrics(self, rates):
+        """Write the metrics to the metrics file atomically."""
+        labels = '{{worker="{}",run="{}"}}'.format(self.worker, self.label)
+        lines = []
+        for name, help_text in self.METRICS:
+            lines += ['# HELP nothanks_{}_total {}'.format(name, help_text),
+                      '# TYPE nothanks_{}_total counter'.format(name),
+                      'nothanks_{}_total{} {}'.format(name, labels, self.counts[name]),
+                      '# HELP nothanks_{}_per_second {}'.format(name, help_text[:-1] + ' per second.'),
+                      '# TYPE nothanks_{}_per_second gauge'.format(name),
+                      'nothanks_{}_per_second{} {:.3f}'.format(name, labels, rates[name])]
+        temp_path = self.metrics_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, self.metrics_path)
+
+    def close(self):
+        """Report the final progress and metrics."""
+        self.report()
+        if self.stream is not None:
+            print(file=self.stream)
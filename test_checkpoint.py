@@ -0,0 +1,32 @@
+import checkpoint
+
+
+def test_save_load(tmpdir):
+    """Ensure saved states load back and missing checkpoints load as None."""
+    path = str(tmpdir.join('state.pkl'))
+    assert checkpoint.load(path) is None
+    checkpoint.save(path, {'results': {3: {'threshold': 0.5}}, 'position': (1, 2)})
+    checkpoint.save(path, {'results': {3: {'threshold': 0.25}}, 'position': (1, 3)})
+    assert checkpoint.load(path) == {'results': {3: {'threshold': 0.25}}, 'position': (1, 3)}
+    assert tmpdir.listdir() == [tmpdir.join('state.pkl')]
+
+
+def test_journal(tmpdir):
+    """Ensure journal records are read back in order and torn writes are dropped."""
+    path = str(tmpdir.join('journal.pkl'))
+    journal = checkpoint.Journal(path)
+    assert journal.records == []
+    journal.append({'games': 0})
+    journal.append({'games': 10})
+
+    # Simulate a run killed part way through writing a record
+    size = tmpdir.join('journal.pkl').size()
+    journal.append({'games': 20, 'nodes': list(range(100))})
+    with open(path, 'ab') as f:
+        f.truncate(size + 10)
+
+    journal = checkpoint.Journal(path)
+    assert journal.records == [{'games': 0}, {'games': 10}]
+    assert tmpdir.join('journal.pkl').size() == size
+    journal.append({'games': 20})
+    assert checkpoint.Journal(path).records == [{'games': 0}, {'games': 10}, {'games': 20}]
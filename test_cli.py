@@ -0,0 +1,58 @@
+import pytest
+
+import bench
+import cli
+
+
+def test_parse_strategy():
+    """Ensure strategies and their arguments are parsed from the command line."""
+    assert cli.parse_strategy('threshold') == 'threshold'
+    assert cli.parse_strategy('threshold:threshold=12') == ('threshold', {'threshold': 12})
+    assert cli.parse_strategy('x:a=1.5,b=name') == ('x', {'a': 1.5, 'b': 'name'})
+
+
+def test_play(capsys):
+    """Ensure a single game can be played from the command line."""
+    cli.main(['play', 'threshold', 'sequence_threshold:threshold=5', 'nothanks'])
+    output = capsys.readouterr().out
+    assert 'sequence_threshold(threshold=5)' in output
+    assert '(winner)' in output
+
+
+def test_lazy_imports():
+    """Ensure the entry points start without importing heavy dependencies."""
+    # Start-up time is machine dependent, so it is checked by bench_imports
+    for module in ['cli', 'compete', 'mini_nothanks_crm']:
+        assert bench.heavy_imports(module) == []
+
+
+def test_parse_address():
+    """Ensure worker addresses are parsed from the command line."""
+    assert cli.parse_address('example.com:6000') == ('example.com', 6000)
+    assert cli.parse_address(':0') == ('localhost', 0)
+
+
+def test_serve(capsys):
+    """Ensure a competition can be served to local workers from the command line."""
+    pytest.importorskip('pandas')
+    cli.main(['compete', 'threshold', 'nothanks', '-n', '20', '--sizes', '3',
+              '--serve', 'localhost:0', '--unit-games', '5', '--local-workers', '2', '-q'])
+    captured = capsys.readouterr()
+    assert 'Serving work units on 127.0.0.1:' in captured.err
+    assert 'combined' in captured.out
+
+
+def test_serve_errors(capsys, monkeypatch):
+    """Ensure unsupported or unsafe distributed options are rejected."""
+    for options in [['--cache', 'cache.sqlite'], ['--record', 'games.bin'],
+                    ['--checkpoint', 'checkpoint.pkl']]:
+        with pytest.raises(SystemExit):
+            cli.main(['compete', '--serve', 'localhost:0'] + options)
+        assert '--serve cannot be combined with ' + options[0] in capsys.readouterr().err
+
+    # The default key is public, so it is refused beyond this machine
+    monkeypatch.delenv('NOTHANKS_AUTHKEY', raising=False)
+    for argv in [['compete', '--serve', '0.0.0.0:0'], ['worker', '192.0.2.1:6000']]:
+        with pytest.raises(SystemExit):
+            cli.main(argv)
+        assert 'set NOTHANKS_AUTHKEY' in capsys.readouterr().err
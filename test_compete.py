@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+import compete
+import results_cache
+import nothanks
+
+
+def test_game_sizes():
+    """Ensure competitions can use any table size and deck."""
+    strategies = ['threshold', ('sequence_threshold', {'threshold': 5})]
+    results = compete.run_competition(strategies, num_rounds=10, game_sizes=[2, 10],
+                                      print_progress=False, low_card=1, high_card=300)
+    assert list(results) == [2, 10]
+    for size_results in results.values():
+        assert list(size_results) == ['threshold', 'sequence_threshold(threshold=5)']
+        # Win shares are relative to an even share so they sum to zero
+        assert abs(sum(size_results.values())) < 1e-9
+
+
+def test_resume(tmpdir, monkeypatch, capsys):
+    """Ensure a resumed competition matches an uninterrupted one."""
+    strategies = ['nothanks', 'threshold', 'sequence_threshold']
+    path = str(tmpdir.join('checkpoint.pkl'))
+    random.seed(0)
+    expected = compete.run_competition(strategies, num_rounds=30, print_progress=False)
+
+    # Kill the competition part way through the 4-player games
+    run = nothanks.Game.run
+    games = []
+    def interrupted_run(game):
+        games.append(game)
+        if len(games) == 45:
+            raise KeyboardInterrupt
+        return run(game)
+    monkeypatch.setattr(nothanks.Game, 'run', interrupted_run)
+    random.seed(0)
+    with pytest.raises(KeyboardInterrupt):
+        compete.run_competition(strategies, num_rounds=30, checkpoint_path=path,
+                                checkpoint_every=7, print_progress=False)
+    monkeypatch.setattr(nothanks.Game, 'run', run)
+
+    random.seed(1)
+    capsys.readouterr()
+    resumed = compete.run_competition(strategies, num_rounds=30, checkpoint_path=path,
+                                      checkpoint_every=7)
+    assert resumed == expected
+    # Progress counts the games left to play when resuming
+    done, total = capsys.readouterr().err.split('\r')[-1].split()[1].split('/')
+    assert done == total == str(90 - 44)
+
+    # A checkpoint cannot be resumed by a competition with other settings
+    with pytest.raises(ValueError):
+        compete.run_competition(strategies[:2], num_rounds=30, checkpoint_path=path,
+                                print_progress=False)
+    for options in [{'num_rounds': 500}, {'game_sizes': (2,)}, {'high_card': 30}]:
+        settings = {'num_rounds': 30, **options}
+        with pytest.raises(ValueError):
+            compete.run_competition(strategies, checkpoint_path=path,
+                                    print_progress=False, **settings)
+
+
+def test_run_table():
+    """Ensure tables replay exactly and leave the random module as they found it."""
+    strategies = ['nothanks', 'threshold', 'sequence_threshold']
+    random.seed(5)
+    state = random.getstate()
+    payoffs = compete.run_table(strategies, 10, 1, {})
+    assert random.getstate() == state
+    assert compete.run_table(strategies, 10, 1, {}) == payoffs
+
+
+def test_table_probability():
+    """Ensure table probabilities match uniform seat sampling."""
+    from itertools import combinations_with_replacement
+    tables = list(combinations_with_replacement('abc', 4))
+    assert abs(sum(compete.get_table_probability(t, 3) for t in tables) - 1) < 1e-12
+    assert compete.get_table_probability('aaa', 3) == 1 / 27
+    assert compete.get_table_probability('abc', 3) == 6 / 27
+
+
+def test_incremental(tmpdir, monkeypatch):
+    """Ensure only tables with new strategies are played and results match a fresh run."""
+    played = []
+    run_table = compete.run_table
+    def counting_run_table(strategies, *args):
+        played.append(strategies)
+        return run_table(strategies, *args)
+    monkeypatch.setattr(compete, 'run_table', counting_run_table)
+
+    strategies = ['nothanks', 'threshold']
+    options = {'games_per_table': 5, 'game_sizes': [3], 'print_progress': False}
+    with results_cache.ResultsCache(str(tmpdir.join('cache.sqlite'))) as cache:
+        first = compete.run_incremental_competition(strategies, cache, **options)
+        assert len(played) == 4
+        assert abs(sum(first[3].values())) < 1e-9
+
+        played.clear()
+        again = compete.run_incremental_competition(strategies, cache, **options)
+        assert played == [] and again == first
+
+        played.clear()
+        strategies.append(('threshold', {'threshold': 5}))
+        extended = compete.run_incremental_competition(strategies, cache, **options)
+        assert len(played) == 10 - 4
+        assert all(('threshold', {'threshold': 5}) in table for table in played)
+
+    with results_cache.ResultsCache(str(tmpdir.join('fresh.sqlite'))) as cache:
+        assert compete.run_incremental_competition(strategies, cache, **options) == extended
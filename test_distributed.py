@@ -0,0 +1,119 @@
+from multiprocessing import get_context
+from multiprocessing.connection import Client
+import random
+import threading
+import time
+
+import pytest
+
+import distributed
+
+STRATEGIES = ['nothanks', 'threshold', ('sequence_threshold', {'threshold': 5})]
+
+
+def take_unit(address, hold):
+    """Take a unit from the coordinator, then disconnect after hold seconds."""
+    with Client(address, authkey=distributed.AUTHKEY) as connection:
+        connection.recv()
+        assert connection.recv() is not None
+        time.sleep(hold)
+
+
+def test_units():
+    """Ensure units cover every game and results are even shares apart."""
+    units = distributed.get_units(25, [3, 4], 10, seed=0)
+    assert [(u.num_players, u.num_games) for u in units] == [
+        (3, 10), (3, 10), (3, 5), (4, 10), (4, 10), (4, 5)]
+    assert [u.unit_id for u in units] == list(range(6))
+    random.seed(5)
+    state = random.getstate()
+    results = distributed.run_units(STRATEGIES, num_rounds=25, game_sizes=[3, 4],
+                                    games_per_unit=10)
+    assert random.getstate() == state
+    assert list(results) == [3, 4]
+    for size_results in results.values():
+        assert abs(sum(size_results.values())) < 1e-9
+    assert results == distributed.run_units(STRATEGIES, num_rounds=25, game_sizes=[3, 4],
+                                            games_per_unit=10)
+
+
+def test_authkey():
+    """Ensure the public default key is only used on this machine."""
+    with pytest.raises(ValueError):
+        distributed.Coordinator(STRATEGIES, address=('0.0.0.0', 0))
+    with pytest.raises(ValueError):
+        distributed.work(('192.0.2.1', 6000))
+    distributed.check_authkey(('0.0.0.0', 0), b'secret')
+
+
+def test_distributed():
+    """Ensure workers reproduce a single-process run exactly."""
+    options = {'num_rounds': 60, 'game_sizes': [3, 5], 'games_per_unit': 7, 'seed': 3,
+               'low_card': 1, 'high_card': 20}
+    expected = distributed.run_units(STRATEGIES, **options)
+    coordinator = distributed.Coordinator(STRATEGIES, print_progress=False, **options)
+    workers = distributed.start_workers(coordinator.address, 3)
+    assert coordinator.run() == expected
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+
+
+def test_lost_units():
+    """Ensure units of lost and stalled workers are retried."""
+    options = {'num_rounds': 30, 'game_sizes': [3, 4], 'games_per_unit': 5}
+    expected = distributed.run_units(STRATEGIES, **options)
+    coordinator = distributed.Coordinator(STRATEGIES, lease_timeout=0.5,
+                                          print_progress=False, **options)
+    results = []
+    runner = threading.Thread(target=lambda: results.append(coordinator.run()))
+    runner.start()
+
+    lost = get_context('spawn').Process(target=take_unit, args=(coordinator.address, 0))
+    lost.start()
+    lost.join(10)
+    stalled = get_context('spawn').Process(target=take_unit, args=(coordinator.address, 30))
+    stalled.start()
+    deadline = time.monotonic() + 10
+    while coordinator.retries < 1 or len(coordinator.pending) == len(coordinator.units):
+        assert time.monotonic() < deadline, 'the lost unit was not handed out again'
+        time.sleep(0.01)
+
+    workers = distributed.start_workers(coordinator.address, 2)
+    runner.join(30)
+    stalled.terminate()
+    assert not runner.is_alive()
+    for worker in workers:
+        worker.join(10)
+    assert results == [expected]
+    assert coordinator.retries == 2
+
+
+def test_slow_units():
+    """Ensure heartbeats keep the lease on units that take longer than the lease timeout."""
+    options = {'num_rounds': 400, 'game_sizes': [3], 'games_per_unit': 200}
+    expected = distributed.run_units(STRATEGIES, **options)
+    coordinator = distributed.Coordinator(STRATEGIES, lease_timeout=0.05,
+                                          print_progress=False, **options)
+    workers = distributed.start_workers(coordinator.address, 2)
+    assert coordinator.run() == expected
+    assert coordinator.retries == 0
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+
+
+def test_failed_unit():
+    """Ensure a unit that keeps failing stops the run rather than hanging it."""
+    coordinator = distributed.Coordinator(STRATEGIES, num_rounds=5, game_sizes=[3],
+                                          games_per_unit=5, max_retries=1,
+                                          print_progress=False)
+    lost = [get_context('spawn').Process(target=take_unit, args=(coordinator.address, 0))
+            for _ in range(2)]
+    for worker in lost:
+        worker.start()
+    with pytest.raises(RuntimeError):
+        coordinator.run()
+    assert coordinator.retries == 2
+    for worker in lost:
+        worker.join(10)
@@ -0,0 +1,127 @@
+import endgame
+import nothanks
+
+
+def test_last_card():
+    """Ensure the obvious choices on the last card are made."""
+    tablebase = endgame.Tablebase()
+    unseen = (1 << 3) | (1 << 4)  # the discards
+
+    # Passing forces an opponent without coins to take a high card
+    position = endgame.encode(35, 0, unseen, 0, [(10, 5, 0), (12, 0, 0)])
+    assert not tablebase.decide(position)
+
+    # Taking a card that continues a run for a big pot wins
+    position = endgame.encode(21, 10, unseen, 0, [(20, 1, 1 << 20), (15, 5, 0)])
+    assert tablebase.decide(position)
+
+    # With no coins there is no choice
+    position = endgame.encode(35, 0, unseen, 0, [(10, 0, 0), (12, 5, 0)])
+    assert tablebase.decide(position)
+
+
+def test_solve():
+    """Ensure payoffs are consistent over a chance node."""
+    tablebase = endgame.Tablebase()
+    unseen = (1 << 5) | (1 << 6) | (1 << 30)
+    position = endgame.encode(20, 0, unseen, 1, [(40, 3, 0), (50, 2, 0), (45, 1, 0)])
+    value = tablebase.solve(position)
+    assert len(value) == 3
+    assert abs(sum(value)) < 1e-9
+    assert all(-1 / 3 - 1e-9 <= v <= 2 / 3 + 1e-9 for v in value)
+    assert position in tablebase.decisions
+
+
+def test_encode():
+    """Ensure held cards that cannot affect scores are dropped."""
+    position = endgame.encode(10, 0, 1 << 20, 1, [(0, 1, (1 << 9) | (1 << 15) | (1 << 21))])
+    assert position[4] == ((0, 1, (1 << 9) | (1 << 21)),)
+
+
+def test_save_load(tmpdir):
+    """Ensure the tablebase persists its decisions."""
+    path = str(tmpdir.join('tablebase.pkl'))
+    tablebase = endgame.Tablebase(path)
+    position = endgame.encode(20, 2, (1 << 5) | (1 << 6), 1, [(40, 3, 0), (50, 2, 0)])
+    decision = tablebase.decide(position)
+    tablebase.save()
+    loaded = endgame.Tablebase(path)
+    assert loaded.decisions == tablebase.decisions
+    assert loaded.decide(position) == decision
+
+
+def test_max_positions():
+    """Ensure a full tablebase stops growing but still decides."""
+    unseen = (1 << 5) | (1 << 6) | (1 << 30)
+    position = endgame.encode(20, 2, unseen, 1, [(40, 3, 0), (50, 2, 0)])
+    decision = endgame.Tablebase().decide(position)
+    tablebase = endgame.Tablebase(max_positions=0)
+    assert tablebase.decide(position) == decision
+    assert tablebase.decisions == {} and not tablebase.changed
+
+
+def play_game(player):
+    game = nothanks.Game([player, nothanks.make_player('threshold'),
+                          nothanks.make_player('sequence_threshold')])
+    game.setup_game()
+    # Step through the game so any exception in play is raised here
+    while game.current_player is not None:
+        current = game.current_player
+        game.step(current.play(game.card, game.pot))
+
+
+def test_shared_tablebase(tmpdir, monkeypatch):
+    """Ensure players share a tablebase by path and it is saved for later runs."""
+    path = str(tmpdir.join('tablebase.pkl'))
+    monkeypatch.setattr(endgame, 'TABLEBASES', {})
+    player = nothanks.make_player(('endgame', {'tablebase': path}))
+    assert player.tablebase is endgame.Player(tablebase=path).tablebase
+    assert endgame.Player().tablebase is not player.tablebase
+    for _ in range(20):  # a player out of coins has no endgame to solve
+        play_game(player)
+        if player.tablebase.changed:
+            break
+    assert player.tablebase.changed
+    endgame.save_tablebases()
+    assert not player.tablebase.changed
+
+    # A later run loads the saved decisions
+    monkeypatch.setattr(endgame, 'TABLEBASES', {})
+    assert endgame.Player(tablebase=path).tablebase.decisions == player.tablebase.decisions
+
+
+def test_player():
+    """Ensure the endgame player plays full games from the game view."""
+    tablebase = endgame.Tablebase()
+    for _ in range(5):
+        play_game(endgame.Player(tablebase=tablebase))
+    assert tablebase.decisions
+
+
+def test_concurrent_saves(tmpdir):
+    """Ensure tablebases saving to the same path keep each other's decisions."""
+    path = str(tmpdir.join('tablebase.pkl'))
+    unseen = (1 << 5) | (1 << 6) | (1 << 30)
+    first, second = endgame.Tablebase(path), endgame.Tablebase(path)
+    first.decide(endgame.encode(20, 2, unseen, 1, [(40, 3, 0), (50, 2, 0)]))
+    second.decide(endgame.encode(21, 0, unseen, 1, [(30, 1, 0), (20, 4, 0)]))
+    first.save()
+    second.save()
+    assert endgame.Tablebase(path).decisions == {**first.decisions, **second.decisions}
+    assert sorted(tmpdir.listdir()) == [tmpdir.join('tablebase.pkl'),
+                                        tmpdir.join('tablebase.pkl.lock')]
+
+
+def test_distributed_workers(tmpdir):
+    """Ensure decisions solved by spawned distributed workers are saved."""
+    import distributed
+    path = str(tmpdir.join('tablebase.pkl'))
+    strategies = [('endgame', {'tablebase': path}), 'threshold']
+    coordinator = distributed.Coordinator(strategies, num_rounds=20, game_sizes=[3],
+                                          games_per_unit=5, print_progress=False)
+    workers = distributed.start_workers(coordinator.address, 2)
+    coordinator.run()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+    assert endgame.Tablebase(path).decisions
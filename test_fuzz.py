@@ -0,0 +1,57 @@
+from random import Random
+
+import fuzz
+
+
+def buggy_engine(case):
+    """Play a case like the step engine, but forget to count runs when scoring."""
+    outcome = fuzz.step_engine(case)
+    _, _, _, coins, hands = outcome.trace[-1]
+    scores = tuple(sum(hand) - c for hand, c in zip(hands, coins))
+    return outcome._replace(scores=scores)
+
+
+def test_reference():
+    """Ensure the reference plays the case as scripted."""
+    case = fuzz.Case(num_players=2, starting_coins=1, low_card=1, high_card=4,
+                     deck=(3, 1, 2), discarded=(4,), decisions=(False, False, True))
+    outcome = fuzz.reference(case)
+    assert outcome.trace[0] == (0, 3, 0, (1, 1), ((), ()))
+    assert outcome.trace[1] == (1, 3, 1, (0, 1), ((), ()))
+    # Seat 0 has no coins so must take the card
+    assert outcome.trace[2] == (0, 3, 2, (0, 0), ((), ()))
+    assert outcome.trace[3] == (0, 1, 0, (2, 0), ((3,), ()))
+    # Turns beyond the script pass until a player runs out of coins
+    assert outcome.trace[-1] == (None, None, None, (0, 2), ((3,), (1, 2)))
+    assert outcome.scores == (3, -1)
+    assert outcome.winners == (1,)
+
+
+def test_step_engine():
+    """Ensure the step API matches the reference."""
+    rng = Random(0)
+    for _ in range(300):
+        case = fuzz.random_case(rng)
+        assert fuzz.compare(case, fuzz.step_engine) is None, case
+
+
+def test_shrink():
+    """Ensure differences are found and shrunk to a minimal case."""
+    rng = Random(0)
+    case = fuzz.random_case(rng, max_cards=30)
+    while fuzz.compare(case, buggy_engine) is None:
+        case = fuzz.random_case(rng, max_cards=30)
+    small = fuzz.shrink(case, buggy_engine)
+    assert fuzz.compare(small, buggy_engine) is not None
+    # A run of two cards is the smallest game the bug shows up in
+    assert small.high_card - small.low_card == 1
+    assert small.num_players == 1
+    assert small.decisions == () and small.discarded == ()
+
+
+def test_fuzz():
+    """Ensure fuzzing reports a shrunk difference or None."""
+    assert fuzz.fuzz(fuzz.step_engine, num_games=200, processes=2, batch_size=50) is None
+    case, difference = fuzz.fuzz(buggy_engine, num_games=200, processes=2, batch_size=50)
+    assert 'scores' in difference
+    assert case.num_players == 1
@@ -0,0 +1,44 @@
+from random import Random
+
+import ladder
+
+
+def test_update():
+    """Ensure ratings move toward the observed results and are conserved."""
+    board = ladder.Ladder(['nothanks', 'threshold', 'sequence_threshold'])
+    board.update(['nothanks', 'threshold', 'sequence_threshold'], [30, 10, 20])
+
+    assert board.ratings['threshold'] > board.ratings['sequence_threshold'] > board.ratings['nothanks']
+    assert abs(sum(board.ratings.values()) - 3 * 1500) < 1e-9
+    assert all(games == 1 for games in board.games.values())
+
+    # Draws between equal ratings change nothing
+    board = ladder.Ladder(['nothanks', 'threshold'])
+    board.update(['nothanks', 'threshold'], [10, 10])
+    assert board.ratings['nothanks'] == board.ratings['threshold'] == 1500
+
+
+def test_matchmake():
+    """Ensure tables are the right size and favor strategies with few games."""
+    strategies = [('threshold', {'threshold': t}) for t in range(10)]
+    board = ladder.Ladder(strategies, rng=Random(0))
+    for name in board.games:
+        board.games[name] = 100
+    board.games['threshold(threshold=7)'] = 0
+
+    table = board.matchmake(4)
+    assert len(table) == 4 == len(set(table))
+    assert table[0] == 'threshold(threshold=7)'
+
+    # Small pools still fill the table
+    board = ladder.Ladder(['threshold'], rng=Random(0))
+    assert board.matchmake(3) == ['threshold'] * 3
+
+
+def test_run():
+    """Ensure a clearly better strategy rises to the top."""
+    board = ladder.Ladder(['nothanks', 'threshold', 'sequence_threshold'], rng=Random(0))
+    board.run(300)
+    standings = board.standings()
+    assert standings[-1][0] == 'nothanks'
+    assert sum(games for _, _, games in standings) == 100 * (3 + 4 + 5)
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+import mini_nothanks_crm
+import nothanks
+
+
+def test_resume(tmpdir, monkeypatch):
+    """Ensure resumed training matches uninterrupted training."""
+    pytest.importorskip('networkx')
+    path = str(tmpdir.join('journal.pkl'))
+    options = {'num_players': 2, 'starting_coins': 1, 'low_card': 1, 'high_card': 4}
+    random.seed(0)
+    tree = mini_nothanks_crm.game_tree(**options)
+    tree.train(100, print_progress=False)
+    expected = tree.reduce()
+
+    # Kill training part way through
+    run = nothanks.Game.run
+    games = []
+    def interrupted_run(game):
+        games.append(game)
+        if len(games) == 57:
+            raise KeyboardInterrupt
+        return run(game)
+    monkeypatch.setattr(nothanks.Game, 'run', interrupted_run)
+    random.seed(0)
+    with pytest.raises(KeyboardInterrupt):
+        mini_nothanks_crm.game_tree(**options).train(
+            100, print_progress=False, checkpoint_path=path, checkpoint_every=20)
+    monkeypatch.setattr(nothanks.Game, 'run', run)
+
+    random.seed(1)
+    tree = mini_nothanks_crm.game_tree(**options)
+    tree.train(100, print_progress=False, checkpoint_path=path, checkpoint_every=20)
+    assert tree.reduce() == expected
+
+    # A journal cannot be resumed by a different game
+    options['starting_coins'] = 2
+    with pytest.raises(ValueError):
+        mini_nothanks_crm.game_tree(**options).train(
+            100, print_progress=False, checkpoint_path=path)
@@ -145,3 +145,123 @@ def test_update_game_pass():
     state['coins'] = 0
     with pytest.raises(Exception):
         game.update_game(player, card, pot, False)
+
+def test_notifications():
+    """Ensure players are only notified of the actions they subscribed to."""
+
+    class RecordingPlayer(nothanks.Player):
+        def __init__(self):
+            self.seen = []
+        def update(self, player_id, card, pot, action):
+            self.seen.append(player_id)
+
+    class OwnPlayer(RecordingPlayer):
+        notifications = nothanks.NOTIFY_OWN
+
+    class QuietPlayer(RecordingPlayer):
+        notifications = nothanks.NOTIFY_NONE
+
+    everything, own, quiet = RecordingPlayer(), OwnPlayer(), QuietPlayer()
+    game = nothanks.Game([everything, own, quiet])
+    game.run()
+
+    assert set(everything.seen) == {id(everything), id(own), id(quiet)}
+    assert own.seen and set(own.seen) == {id(own)}
+    assert quiet.seen == []
+    assert nothanks.get_notifications(nothanks.Player()) == nothanks.NOTIFY_NONE
+
+def test_view():
+    """Ensure the game view reflects the game state without allowing changes."""
+    players = [nothanks.Player(), nothanks.Player(), nothanks.Player()]
+    game = nothanks.Game(players)
+    game.setup_game()
+    view = players[0].view
+    assert view is game.view
+    assert view.player_order == [id(p) for p in game.players]
+    assert view.card == game.card
+    assert view.deck_size == len(game.deck)
+
+    pid = id(players[0])
+    cards = view.cards(pid)
+    game.update_game(players[0], game.card, 4, True)
+    assert list(cards) == list(game.state[pid]['cards'])
+    assert view.coins(pid) == game.state[pid]['coins']
+    assert view.scores() == game.get_scores()
+    with pytest.raises(AttributeError):
+        cards.add(1)
+
+def test_snapshot_restore():
+    """Ensure a game can be stepped forward and restored to a snapshot."""
+    players = [nothanks.Player(), nothanks.Player(), nothanks.Player()]
+    game = nothanks.Game(players)
+    game.setup_game()
+    cards = game.view.cards(id(game.current_player))
+    snapshot = game.snapshot()
+
+    while game.step(True):
+        pass
+    assert game.current_player is None
+    assert not game.deck
+    final = game.snapshot()
+
+    assert len(game.decisions) == len(final.decisions) > 0
+
+    game.restore(snapshot)
+    assert game.snapshot() == snapshot
+    assert game.decisions == []
+    assert len(cards) == 0  # views stay attached to the restored state
+    while game.step(True):
+        pass
+    assert game.snapshot() == final
+
+def test_step():
+    """Ensure step follows the same rules as play."""
+    players = [nothanks.Player(), nothanks.Player(), nothanks.Player()]
+    game = nothanks.Game(players)
+    game.setup_game()
+    player, card, pot = game.current_player, game.card, game.pot
+
+    assert game.step(False)
+    assert game.current_player is not player
+    assert game.card == card and game.pot == pot + 1
+    assert game.decisions == [False]
+
+    # A player without coins must take the card
+    game.state[id(game.current_player)]['coins'] = 0
+    taker = game.current_player
+    assert game.step(False)
+    assert card in game.state[id(taker)]['cards']
+    assert game.current_player is taker
+    assert game.decisions == [False, True]
+
+def test_copy():
+    """Ensure copies of the game are independent of the original."""
+    players = [nothanks.Player(), nothanks.Player(), nothanks.Player()]
+    game = nothanks.Game(players)
+    game.setup_game()
+    snapshot = game.snapshot()
+
+    sim = game.view.simulate()
+    assert sorted(sim.deck + sim.discarded) == sorted(game.deck + game.discarded)
+    assert len(sim.deck) == len(game.deck)
+    while sim.step(False):
+        pass
+    assert game.snapshot() == snapshot
+
+def test_make_player():
+    """Ensure players are created from strategy module names and parameters."""
+    import threshold
+    assert type(nothanks.make_player('nothanks')) is nothanks.Player
+    player = nothanks.make_player(('threshold', {'threshold': 4}))
+    assert isinstance(player, threshold.Player) and player.threshold == 4
+    assert nothanks.strategy_name('threshold') == 'threshold'
+    assert nothanks.strategy_name(('threshold', {'threshold': 4})) == 'threshold(threshold=4)'
+
+def test_large_game():
+    """Ensure large tables and decks play out."""
+    players = [nothanks.Player() for _ in range(10)]
+    game = nothanks.Game(players, low_card=1, high_card=500, discard=20)
+    game.run()
+    cards = [card for state in game.state.values() for card in state['cards']]
+    assert sorted(cards) == sorted(game.deck_order)
+    assert len(cards) == 480
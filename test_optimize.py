@@ -0,0 +1,50 @@
+from random import Random
+
+import pytest
+
+import optimize
+
+
+def test_summarize():
+    """Ensure the mean and confidence interval are computed from the payoffs."""
+    result = optimize.summarize({'threshold': 1}, [0.5, -0.5, 0.5, -0.5])
+    assert result.params == {'threshold': 1}
+    assert result.mean == 0
+    assert result.low < 0 < result.high
+    assert result.high - 0 == 0 - result.low
+    assert result.games == 4
+
+
+def test_evaluate():
+    """Ensure batches are reproducible from their seed."""
+    payoffs = optimize.evaluate('threshold', ['nothanks'], 3, 20, 1, {})
+    assert len(payoffs) == 20
+    assert all(-1 / 3 - 1e-9 <= p <= 2 / 3 + 1e-9 for p in payoffs)
+    assert payoffs == optimize.evaluate('threshold', ['nothanks'], 3, 20, 1, {})
+
+
+def test_optimize():
+    """Ensure bad candidates are dropped early and the best is reported first."""
+    candidates = [{'threshold': -100}, {'threshold': 10}, {'threshold': 100}]
+    results = optimize.optimize('threshold', candidates, ['sequence_threshold'],
+                                num_players=3, batch_size=20, rng=Random(0))
+    assert results[0].params == {'threshold': 10}
+    assert results[0].games == 20 + 40
+    assert sorted(r.games for r in results) == [20, 60, 60]
+
+
+def test_optimize_terminates():
+    """Ensure every round drops a candidate and bad arguments are rejected."""
+    candidates = [{'threshold': t} for t in range(4)]
+    results = optimize.optimize('threshold', candidates, ['nothanks'], num_players=3,
+                                batch_size=2, keep=0.9, rng=Random(0))
+    assert sorted(r.games for r in results) == [2, 2 + 4, 2 + 4 + 8, 2 + 4 + 8]
+    # A lone candidate is evaluated once
+    results = optimize.optimize('threshold', [{'threshold': 10}], ['nothanks'],
+                                num_players=3, batch_size=2, rng=Random(0))
+    assert [r.games for r in results] == [2]
+    with pytest.raises(ValueError):
+        optimize.optimize('threshold', [], ['nothanks'])
+    for keep in (0, 1, 1.5):
+        with pytest.raises(ValueError):
+            optimize.optimize('threshold', candidates, ['nothanks'], keep=keep)
@@ -0,0 +1,103 @@
+from random import Random
+
+import pytest
+
+import nothanks
+import records
+
+
+def play_game(rng):
+    players = [nothanks.make_player(s) for s in ['nothanks', 'threshold', 'sequence_threshold']]
+    names = {id(p): nothanks.strategy_name(s) for s, p in
+             zip(['nothanks', 'threshold', 'sequence_threshold'], players)}
+    game = nothanks.Game(players, rng=rng)
+    game.run()
+    return game, names
+
+
+def test_pack_bits():
+    """Ensure decisions survive packing into bits."""
+    bits = [True, False, False, True, True, False, True, False, True]
+    packed = records.pack_bits(bits)
+    assert len(packed) == 2
+    assert records.unpack_bits(packed, len(bits)) == bits
+
+
+def test_round_trip(tmpdir):
+    """Ensure recorded games can be read back and replayed."""
+    path = str(tmpdir.join('games.bin'))
+    rng = Random(0)
+    games = []
+    with records.RecordWriter(path, chunk_size=3) as writer:
+        for _ in range(7):
+            game, names = play_game(rng)
+            writer.write(game, names)
+            games.append((game, names))
+
+    assert tmpdir.join('games.bin').size() == 7 * writer.layout.size
+    read = list(records.iter_records(path))
+    assert len(read) == 7
+    for (game, names), (strategies, scores, deck, decisions) in zip(games, read):
+        assert strategies == [names[id(p)] for p in game.players]
+        assert list(scores) == [game.get_scores()[id(p)] for p in game.players]
+        assert tuple(deck) == game.deck_order
+        assert decisions == [bool(d) for d in game.decisions]
+
+    # Appending continues the same log
+    with records.RecordWriter(path) as writer:
+        writer.write(*play_game(rng))
+    assert len(list(records.iter_records(path))) == 8
+
+
+def test_read_array(tmpdir):
+    """Ensure the log loads as a NumPy array."""
+    np = pytest.importorskip('numpy')
+    path = str(tmpdir.join('games.bin'))
+    with records.RecordWriter(path) as writer:
+        game, names = play_game(Random(0))
+        writer.write(game, names)
+    array, strategies = records.read_array(path)
+    assert len(array) == 1
+    assert array['num_decisions'][0] == len(game.decisions)
+    decisions = np.unpackbits(array['decisions'][0])[:len(game.decisions)]
+    assert list(decisions) == [int(bool(d)) for d in game.decisions]
+
+
+def test_read_frame(tmpdir):
+    """Ensure logs of mixed table sizes load as a DataFrame with empty seats."""
+    pytest.importorskip('pandas')
+    path = str(tmpdir.join('games.bin'))
+    rng = Random(0)
+    games = []
+    with records.RecordWriter(path) as writer:
+        for strategies in [['threshold', 'nothanks', 'sequence_threshold'],
+                           ['nothanks', 'threshold', 'threshold', 'nothanks', 'threshold']]:
+            players = [nothanks.make_player(s) for s in strategies]
+            game = nothanks.Game(players, rng=rng)
+            game.run()
+            names = {id(p): s for s, p in zip(strategies, players)}
+            writer.write(game, names)
+            games.append((game, names))
+    frame = records.read_frame(path)
+    assert list(frame['num_players']) == [3, 5]
+    for row, (game, names) in enumerate(games):
+        seats = range(len(game.players))
+        assert [frame['strategy_{}'.format(seat)][row] for seat in seats] == \
+            [names[id(p)] for p in game.players]
+        scores = game.get_scores()
+        assert [frame['score_{}'.format(seat)][row] for seat in seats] == \
+            [scores[id(p)] for p in game.players]
+    assert frame['strategy_4'].isna()[0] and frame['score_4'].isna()[0]
+
+
+def test_truncate(tmpdir):
+    """Ensure a log can be rewound to an earlier number of records."""
+    path = str(tmpdir.join('games.bin'))
+    rng = Random(0)
+    with records.RecordWriter(path) as writer:
+        for _ in range(5):
+            writer.write(*play_game(rng))
+        writer.flush()
+        writer.truncate(2)
+        writer.write(*play_game(rng))
+    assert len(list(records.iter_records(path))) == 3
@@ -0,0 +1,39 @@
+import results_cache
+
+
+def test_strategy_key():
+    """Ensure strategies are identified by module, parameters and code."""
+    assert results_cache.strategy_key('threshold') == results_cache.strategy_key(('threshold', {}))
+    assert results_cache.strategy_key('threshold') != results_cache.strategy_key(('threshold', {'threshold': 5}))
+    assert results_cache.get_code_hash('threshold') in results_cache.strategy_key('threshold')
+
+
+def test_dependencies(monkeypatch):
+    """Ensure a strategy's identity changes with the local code it builds on."""
+    assert results_cache.get_dependencies('endgame') == (
+        'checkpoint', 'endgame', 'nothanks', 'sequence_threshold')
+    key = results_cache.strategy_key('endgame')
+    other_key = results_cache.strategy_key('threshold')
+    get_code_hash = results_cache.get_code_hash
+    monkeypatch.setattr(results_cache, 'get_code_hash', lambda name: get_code_hash(name) +
+                        ('edited' if name == 'sequence_threshold' else ''))
+    assert results_cache.strategy_key('endgame') != key
+    assert results_cache.strategy_key('threshold') == other_key
+
+
+def test_table_key():
+    """Ensure table keys ignore seat order but not the games played."""
+    a, b = results_cache.strategy_key('threshold'), results_cache.strategy_key('nothanks')
+    assert results_cache.table_key([a, b], 10, 0, {}) == results_cache.table_key([b, a], 10, 0, {})
+    assert results_cache.table_key([a, b], 10, 0, {}) != results_cache.table_key([a, b], 10, 1, {})
+    assert results_cache.table_key([a, b], 10, 0, {}) != results_cache.table_key([a, b], 10, 0, {'discard': 5})
+
+
+def test_cache(tmpdir):
+    """Ensure results persist across connections."""
+    path = str(tmpdir.join('cache.sqlite'))
+    with results_cache.ResultsCache(path) as cache:
+        assert cache.get('key') is None
+        cache.put('key', [0.25, -0.25])
+    with results_cache.ResultsCache(path) as cache:
+        assert cache.get('key') == [0.25, -0.25]
@@ -1,4 +1,5 @@
 import pytest
+import nothanks
 import sequence_threshold
 from sortedcontainers import SortedSet
 
@@ -76,4 +77,11 @@ def test_decision():
     assert player.play(29, 1) == True
     assert player.play(32, 1) == False
     with pytest.raises(Exception):
-        player.play(30, 1)
\ No newline at end of file
+        player.play(30, 1)
+
+def test_view():
+    """Ensure the player reads its cards from the game."""
+    player = sequence_threshold.Player()
+    game = nothanks.Game([player, nothanks.Player()])
+    game.run()
+    assert list(player.cards) == list(game.state[id(player)]['cards'])
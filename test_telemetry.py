@@ -0,0 +1,42 @@
+import io
+
+import nothanks
+import telemetry
+
+
+def test_throughput(tmpdir):
+    """Ensure throughput metrics are written in the Prometheus text format."""
+    path = str(tmpdir.join('metrics.prom'))
+    stream = io.StringIO()
+    throughput = telemetry.Throughput('compete', total=10, metrics_path=path,
+                                      stream=stream, worker='w1')
+    for _ in range(10):
+        throughput.update(games=1, decisions=50)
+    throughput.close()
+
+    assert '10/10' in stream.getvalue()
+    lines = tmpdir.join('metrics.prom').read().splitlines()
+    assert '# TYPE nothanks_games_total counter' in lines
+    assert 'nothanks_games_total{worker="w1",run="compete"} 10' in lines
+    assert 'nothanks_decisions_total{worker="w1",run="compete"} 500' in lines
+    rate = [l for l in lines if l.startswith('nothanks_games_per_second{')][0]
+    assert float(rate.split()[-1]) > 0
+
+
+def test_profiler():
+    """Ensure CPU time is attributed to strategies and engine phases."""
+    strategies = ['threshold', 'sequence_threshold']
+    with telemetry.Profiler(strategies) as profiler:
+        for _ in range(20):
+            players = [nothanks.make_player(s) for s in strategies * 2]
+            nothanks.Game(players).run()
+    modules, phases = profiler.cpu_times()
+    assert modules['threshold'] > 0
+    assert modules['sequence_threshold'] > 0
+    assert set(phases) == set(telemetry.ENGINE_PHASES)
+    assert phases['play'] > 0
+
+    stream = io.StringIO()
+    profiler.report(stream)
+    assert 'sequence_threshold' in stream.getvalue()
+    assert 'notify' in stream.getvalue()
@@ -3,6 +3,8 @@ import nothanks
 
 class Player(nothanks.Player):
 
+    notifications = nothanks.NOTIFY_NONE
+
     def __init__(self, threshold=10):
         self.threshold = threshold
 